@@ -0,0 +1,113 @@
+"""Benchmark the reference implementation on the models of the model zoo."""
+
+import argparse
+from functools import partial
+import inspect
+import os
+import tempfile
+import timeit
+from typing import Callable, Dict, Iterator, Tuple
+
+import onnx
+
+from common import InconsistencyError
+from cnn_onnx import model_zoo, parse_param
+from cnn_reference import conv
+from fp_helper import random_fixed_array, Bitwidth
+from weights_to_files import format_weights, format_weights_object
+
+
+def iterate_conv_shapes(param: dict) -> Iterator[Tuple[tuple, tuple, tuple]]:
+    """Obtain the input shape, weights shape and kernel parameter of each
+    convolution layer."""
+    height, width = param["input_height"], param["input_width"]
+    for pelem in range(param["pe"]):
+        ksize = param["conv_kernel"][pelem]
+        stride = param["conv_stride"][pelem]
+        pad = param["pad"][pelem]
+        channel_in, channel_out = param["channel"][pelem:pelem+2]
+        height, width = height + 2 * pad, width + 2 * pad
+        yield ((1, channel_in, height, width),
+               (channel_out, channel_in, ksize, ksize),
+               (ksize, stride))
+
+        height = (height - ksize) // stride + 1
+        width = (width - ksize) // stride + 1
+        pool_ksize = param["pool_kernel"][pelem]
+        pool_stride = param["pool_stride"][pelem]
+        if pool_ksize:
+            height = (height - pool_ksize) // pool_stride + 1
+            width = (width - pool_ksize) // pool_stride + 1
+
+
+def benchmark_conv(param: dict, repeat: int = 1) -> Dict[str, float]:
+    """Compare the runtime of the object based and the integer based
+    convolution."""
+    bitwidth = Bitwidth(total_bits=8)
+    runtime = {"object": 0., "integer": 0.}
+    for shape_in, shape_weights, kernel_param in iterate_conv_shapes(param):
+        array_in = random_fixed_array(shape_in, bitwidth)
+        weights = random_fixed_array(shape_weights, bitwidth)
+        bias = random_fixed_array(
+            shape_weights[:1],
+            Bitwidth(int_bits=bitwidth.int_bits,
+                     frac_bits=bitwidth.frac_bits))
+        for name, integer in (("object", False), ("integer", True)):
+            runtime[name] += timeit.timeit(
+                partial(conv, array_in, weights, bias, kernel_param,
+                        bitwidth.as_tuple, integer=integer),
+                number=repeat) / repeat
+    return runtime
+
+
+def benchmark_weights(param: dict, repeat: int = 1) -> Dict[str, float]:
+    """Compare the runtime of the element wise and the vectorized weight
+    formatting. The text formats have to be byte identical."""
+    bitwidth = Bitwidth(total_bits=8)
+    runtime = {"object": 0., "integer": 0.}
+    for _, shape_weights, _ in iterate_conv_shapes(param):
+        weights = random_fixed_array(shape_weights, bitwidth)
+        bias = random_fixed_array(shape_weights[:1], bitwidth)
+        formatted = format_weights(weights, bias)
+        for key, val in format_weights_object(weights, bias).items():
+            if formatted[key] != val:
+                raise InconsistencyError(f"Weight file {key} differs.")
+
+        for name, function in (("object", format_weights_object),
+                               ("integer", format_weights)):
+            runtime[name] += timeit.timeit(
+                partial(function, weights, bias), number=repeat) / repeat
+    return runtime
+
+
+def get_models() -> Iterator[Tuple[str, Callable]]:
+    """Obtain all models of the model zoo."""
+    for name, function in inspect.getmembers(model_zoo, inspect.isfunction):
+        if function.__module__ == model_zoo.__name__:
+            yield name, function
+
+
+def main():
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Repetitions per measurement.")
+    args = parser.parse_args()
+
+    print(f"{'model':40} {'object [s]':>12} {'integer [s]':>12} "
+          f"{'speedup':>8}  (convolution / weight files)")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, function in get_models():
+            model_path = os.path.join(tmpdir, name + ".onnx")
+            onnx.save(function(), model_path)
+            param = parse_param.parse_param(model_path)
+
+            for runtime in (benchmark_conv(param, args.repeat),
+                            benchmark_weights(param, args.repeat)):
+                print(f"{name:40} {runtime['object']:12.4f} "
+                      f"{runtime['integer']:12.4f} "
+                      f"{runtime['object'] / runtime['integer']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,51 +2,86 @@
 in the VHDL design at simulation and synthesis."""
 
 import argparse
+import json
 import math
+import os
+from typing import Dict, List, Optional, Tuple, Union
 
 import onnx
-from onnx import numpy_helper
 
 from common import InconsistencyError
-from fp_helper import to_fixed_point_array
-from weights_to_files import weights_to_files
+from fp_helper import FixedArray
+from cnn_onnx.model_context import ModelContext, get_context
+from weights_cache import quantize_cached
+from weights_to_files import pack_weights, weights_to_files
 
+# name of the packed image of all layers, see "pack_weights()"
+PACKED_IMAGE = "weights.mem"
+PACKED_OFFSETS = "weights_offsets.json"
+
+
+def quantize_layer(weights_dict, node: onnx.NodeProto,
+                   aggressive: bool = False) -> Tuple[FixedArray, FixedArray]:
+    """Quantize the weights and bias of a convolution node to the fixed
+    point format of the weights."""
+    frac_bits = int(math.log2(weights_dict[node.input[4]]))
+    fixed_kernel = quantize_cached(weights_dict[node.input[3]],
+                                   8 - frac_bits, frac_bits,
+                                   aggressive=aggressive)
+    fixed_bias = quantize_cached(weights_dict[node.input[8]],
+                                 8 - frac_bits, frac_bits,
+                                 aggressive=aggressive)
+    return fixed_kernel, fixed_bias
 
-def convert_weights(model: str, output_dir: str = "weights",
-                    aggressive: bool = False) -> None:
-    """Extract weights from model, convert them into binary fixed point and
-    save to file."""
-    net = onnx.load(model)
 
-    weights_dict = {}
-    for init in net.graph.initializer:
-        weights_dict[init.name] = numpy_helper.to_array(init)
+def save_packed(layers: List[Dict[str, bytes]], layer_names: List[str],
+                output_dir: str) -> List[Tuple[int, int]]:
+    """Write the packed image of all layers and its offset table. The
+    offsets (in lines) of weights and bias of each layer are returned."""
+    image, offsets = pack_weights(layers)
+    with open(os.path.join(output_dir, PACKED_IMAGE), "wb") as outfile:
+        outfile.write(image)
+    with open(os.path.join(output_dir, PACKED_OFFSETS), "w") as outfile:
+        json.dump({name: {"weights": weights, "bias": bias}
+                   for name, (weights, bias) in zip(layer_names, offsets)},
+                  outfile, indent=2)
+    return offsets
 
+
+def convert_weights(model: Union[str, onnx.ModelProto, ModelContext],
+                    output_dir: str = "weights", aggressive: bool = False,
+                    packed: bool = False
+                    ) -> Optional[List[Tuple[int, int]]]:
+    """Extract weights from model, convert them into binary fixed point and
+    save to file. The model can be given as path, loaded model or
+    "ModelContext". If "packed" is set, a single image of all layers and
+    its offset table are written additionally. In this case, the offsets
+    (in lines) of weights and bias of each layer in the image are
+    returned."""
+    context = get_context(model)
+    weights_dict = context.weights_dict
+
+    layers, layer_names = [], []
     last_layer_name = ""
-    for node in net.graph.node:
-        if node.op_type == "QLinearConv":
-            # only convolution layers contain weights
-            kernel = weights_dict[node.input[3]]
-            bias = weights_dict[node.input[8]]
-
-            layer_name = node.input[3][:16].zfill(16)
-            if last_layer_name and len(last_layer_name) != len(layer_name):
-                raise InconsistencyError(
-                    f"Layer names have different length. "
-                    f"{len(last_layer_name)} != {len(layer_name)}. "
-                    f"Padding to 16 chars failed.")
-            last_layer_name = layer_name
-
-            int_bits = 8 - int(math.log2(weights_dict[node.input[4]]))
-            frac_bits = int(math.log2(weights_dict[node.input[4]]))
-
-            kernel = to_fixed_point_array(
-                kernel, int_bits=int_bits, frac_bits=frac_bits,
-                aggressive=aggressive)
-            bias = to_fixed_point_array(
-                bias, int_bits=int_bits, frac_bits=frac_bits,
-                aggressive=aggressive)
-            weights_to_files(kernel, bias, layer_name, output_dir)
+    # only convolution layers contain weights
+    for node in context.get_nodes("QLinearConv"):
+        layer_name = node.input[3][:16].zfill(16)
+        if last_layer_name and len(last_layer_name) != len(layer_name):
+            raise InconsistencyError(
+                f"Layer names have different length. "
+                f"{len(last_layer_name)} != {len(layer_name)}. "
+                f"Padding to 16 chars failed.")
+        last_layer_name = layer_name
+
+        fixed_kernel, fixed_bias = quantize_layer(weights_dict, node,
+                                                  aggressive)
+        layers.append(weights_to_files(fixed_kernel, fixed_bias, layer_name,
+                                       output_dir))
+        layer_names.append(layer_name)
+
+    if not packed:
+        return None
+    return save_packed(layers, layer_names, output_dir)
 
 
 if __name__ == "__main__":
@@ -54,6 +89,9 @@ if __name__ == "__main__":
     PARSER.add_argument("model", help="Path to a .onnx model")
     PARSER.add_argument(
         "--output-dir", type=str, help="Output directory of weights")
+    PARSER.add_argument(
+        "--packed", action="store_true",
+        help="Write a single image of all layers additionally.")
     ARGS = PARSER.parse_args()
 
-    convert_weights(ARGS.model, ARGS.output_dir)
+    convert_weights(ARGS.model, ARGS.output_dir, packed=ARGS.packed)
@@ -0,0 +1,113 @@
+"""Calculate the inference of a whole dataset in parallel. The images are
+split into chunks, which are distributed to a pool of worker processes.
+Each worker loads and compiles the model only once."""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import onnx
+
+from cnn_onnx import inference, parse_param
+from fp_helper import FixedArray
+
+# compiled model of the current worker process, see "init_worker()"
+WORKER_PLAN: Tuple[Callable, ...] = ()
+
+
+def load_images(path: str, shape: Sequence[int]) -> np.ndarray:
+    """Load the images of a dataset as array of the shape
+    (image, channel, height, width). The dataset is either an .npy file,
+    which gets memory-mapped, or a directory of .npy or image files."""
+    if not os.path.isdir(path):
+        return np.load(path, mmap_mode="r")
+
+    images: List[np.ndarray] = []
+    for filename in sorted(os.listdir(path)):
+        filepath = os.path.join(path, filename)
+        if filename.endswith(".npy"):
+            images.append(np.load(filepath))
+            continue
+
+        # PIL is only needed for image files
+        import PIL.Image  # pylint: disable=import-outside-toplevel
+        channel, height, width = shape
+        image = PIL.Image.open(filepath).convert(
+            "L" if channel == 1 else "RGB").resize(
+                (width, height), PIL.Image.BILINEAR)
+        images.append(
+            np.asarray(image).reshape(height, width, channel).transpose(
+                (2, 0, 1)))
+    return np.stack(images)
+
+
+def init_worker(model_path: str) -> None:
+    """Load and compile the model once per worker process."""
+    global WORKER_PLAN  # pylint: disable=global-statement
+    WORKER_PLAN = inference.compile_model(onnx.load(model_path))
+
+
+def infer_chunk(images: np.ndarray) -> np.ndarray:
+    """Calculate the inference of a chunk of images at once. The images
+    are unsigned 8 bit integers, like in the toplevel testbench. The raw
+    integer fields of the output are returned."""
+    fixed_in = FixedArray(np.asarray(images), 8, 0, signed=False)
+    output = inference.run_plan(WORKER_PLAN, fixed_in.to_object())
+    return FixedArray.from_object(output).data
+
+
+def iterate_chunks(images: np.ndarray,
+                   chunk_size: int) -> Iterator[np.ndarray]:
+    """Split the images into chunks. Memory-mapped images are only read
+    when the chunk is sent to a worker."""
+    for start in range(0, len(images), chunk_size):
+        yield np.asarray(images[start:start + chunk_size])
+
+
+def dataset_inference(model_path: str, images: np.ndarray,
+                      workers: Optional[int] = None,
+                      chunk_size: int = 16) -> Iterator[np.ndarray]:
+    """Calculate the inference of all images in parallel. The predictions
+    are yielded chunk by chunk, in the order of the images."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(model_path,)) as executor:
+        yield from executor.map(infer_chunk,
+                                iterate_chunks(images, chunk_size))
+
+
+def main():
+    """Main function to calculate the inference of a dataset."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model", type=str, help="Path to the model.")
+    parser.add_argument("images", type=str,
+                        help="Path to an .npy file or a directory of images.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Count of worker processes.")
+    parser.add_argument("--chunk-size", type=int, default=16,
+                        help="Images per chunk.")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Path to store the predictions (.npy).")
+    args = parser.parse_args()
+
+    shape = parse_param.get_input_shape(onnx.load(args.model))[1:]
+    images = load_images(args.images, shape)
+
+    start = time.perf_counter()
+    predictions, done = [], 0
+    for chunk in dataset_inference(args.model, images, args.workers,
+                                   args.chunk_size):
+        predictions.append(chunk)
+        done += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"{done}/{len(images)} images, "
+              f"{done / elapsed:.1f} images/s")
+
+    if args.output is not None:
+        np.save(args.output, np.concatenate(predictions))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,75 @@
 """Calculate the inference of a CNN model in ONNX format with the self defined
 functions."""
 
+from functools import partial
 import math
+from typing import Callable, Iterable, Iterator, List, Mapping, Tuple
 
 from fpbinary import FpBinary
 import numpy as np
 import onnx
-from onnx import numpy_helper
 
-from common import NotSupportedError
+from common import InconsistencyError, NotSupportedError
 import cnn_reference
+import cnn_stream
 from cnn_onnx import model_zoo, parse_param
-from fp_helper import to_fixed_point_array
+from cnn_onnx.model_context import get_context
+from fp_helper import FixedArray
+from weights_cache import quantize_cached
 
 
-def numpy_inference(onnx_model, input_):
-    """Calculate the inference of a given input with a given model."""
-    weights_dict = {}
-    for init in onnx_model.graph.initializer:
-        weights_dict[init.name] = numpy_helper.to_array(init)
+def get_conv_param(node, weights_dict: Mapping) -> Tuple:
+    """Obtain the weights, bias and the output bitwidth of a convolution
+    node. Weights and bias are "FixedArray" of the same format."""
+    int_bits_weights = 8 - int(math.log2(weights_dict[node.input[4]]))
+    frac_bits_weights = int(math.log2(weights_dict[node.input[4]]))
+    weights = quantize_cached(
+        weights_dict[node.input[3]], int_bits_weights, frac_bits_weights)
+    bias = quantize_cached(
+        weights_dict[node.input[8]], int_bits_weights, frac_bits_weights)
 
-    next_input = input_
-    for node in onnx_model.graph.node:
+    bitwidth_out = (
+        8 - int(math.log2(weights_dict[node.input[6]])),
+        int(math.log2(weights_dict[node.input[6]])),
+    )
+    return weights, bias, bitwidth_out
+
+
+def get_weights_dict(onnx_model) -> Mapping:
+    """Obtain all initializers of a model as numpy arrays."""
+    return get_context(onnx_model).weights_dict
+
+
+def conv_layer(array_in, weights: FixedArray, bias: FixedArray,
+               param: Tuple[int, int], bitwidth_out: Tuple[int, int]):
+    """Convolution layer of a compiled model. Weights and bias are already
+    converted, so that only the input is converted before calling
+    "cnn_reference.conv_int()"."""
+    fixed_in = FixedArray.from_object(array_in)
+    signed = fixed_in.signed or weights.signed or bias.signed
+    raw_out = cnn_reference.conv_int(
+        fixed_in.data, weights.data, bias.data,
+        (fixed_in.frac_bits, weights.frac_bits), param, bitwidth_out, signed)
+    return FixedArray(raw_out, *bitwidth_out, signed).to_object()
+
+
+def compile_model(onnx_model) -> Tuple[Callable, ...]:
+    """Compile a model into an immutable inference plan. The plan is a tuple
+    of layer functions, which contain the already converted weights, bias,
+    bitwidths and padding. Each layer takes the output of the previous
+    layer. See "run_plan()". The model can be given as loaded model or
+    "ModelContext". The arrays of weights and bias are read-only.
+
+    >>> from cnn_onnx import model_zoo
+    >>> plan = compile_model(model_zoo.conv_3x1_1x1_max_2x2())
+    >>> plan[0].keywords["weights"].data.flags.writeable
+    False
+    """
+    context = get_context(onnx_model)
+    weights_dict = context.weights_dict
+
+    plan: List[Callable] = []
+    for node in context.nodes:
         params = parse_param.parse_node_attributes(node)
 
         if node.op_type == "Conv":
@@ -29,38 +77,150 @@ def numpy_inference(onnx_model, input_):
         if node.op_type == "QLinearConv":
             pad = parse_param.get_pad(params)
             if pad:
-                next_input = cnn_reference.zero_pad(next_input, pad)
+                plan.append(partial(cnn_reference.zero_pad, size=pad))
 
             ksize, stride = parse_param.get_kernel_params(params)
-
-            int_bits_weights = 8 - int(math.log2(weights_dict[node.input[4]]))
-            frac_bits_weights = int(math.log2(weights_dict[node.input[4]]))
-            weights = to_fixed_point_array(
-                weights_dict[node.input[3]], int_bits=int_bits_weights,
-                frac_bits=frac_bits_weights)
-            bias = to_fixed_point_array(
-                weights_dict[node.input[8]], int_bits=int_bits_weights,
-                frac_bits=frac_bits_weights)
-
-            bitwidth_out = (
-                8 - int(math.log2(weights_dict[node.input[6]])),
-                int(math.log2(weights_dict[node.input[6]])),
-            )
-            next_input = cnn_reference.conv(
-                next_input, weights, bias, (ksize, stride), bitwidth_out)
+            weights, bias, bitwidth_out = get_conv_param(node, weights_dict)
+            if weights.shape[2:] != (ksize, ksize):
+                raise InconsistencyError(
+                    f"Kernel size doesn't fit. {weights.shape[2:]} != "
+                    f"{(ksize, ksize)}")
+            if bias.shape != weights.shape[:1]:
+                raise InconsistencyError(
+                    f"Output channel don't fit. {weights.shape[0]} != "
+                    f"{bias.shape[0]}")
+            for array in (weights, bias):
+                array.data.flags.writeable = False
+            plan.append(partial(
+                conv_layer, weights=weights, bias=bias,
+                param=(ksize, stride), bitwidth_out=bitwidth_out))
         elif node.op_type == "MaxPool":
             ksize, stride = parse_param.get_kernel_params(params)
-            next_input = cnn_reference.max_pool(next_input, ksize, stride)
+            plan.append(partial(
+                cnn_reference.max_pool, ksize=ksize, stride=stride))
         elif node.op_type == "GlobalAveragePool":
-            next_input = cnn_reference.avg_pool(next_input)
+            plan.append(cnn_reference.avg_pool)
         elif node.op_type == "Relu":
-            next_input = cnn_reference.relu(next_input)
+            plan.append(cnn_reference.relu)
         elif node.op_type == "LeakyRelu":
-            next_input = cnn_reference.leaky_relu(
-                next_input, FpBinary(int_bits=0, frac_bits=3, value=0.125))
+            plan.append(partial(
+                cnn_reference.leaky_relu,
+                alpha=FpBinary(int_bits=0, frac_bits=3, value=0.125)))
+    return tuple(plan)
+
+
+def run_plan(plan: Tuple[Callable, ...], input_):
+    """Calculate the inference of a given input with a compiled model."""
+    next_input = input_
+    for layer in plan:
+        next_input = layer(next_input)
     return next_input
 
 
+def numpy_inference(onnx_model, input_):
+    """Calculate the inference of a given input with a given model.
+    The input can contain multiple images along the batch axis, which are
+    processed at once. To calculate the inference of multiple inputs with
+    the same model, compile it once by "compile_model()"."""
+    return run_plan(compile_model(onnx_model), input_)
+
+
+def pe_inference(onnx_model, input_):
+    """Calculate the inference of a given input with a given model PE by PE,
+    like in "top.vhd". Each PE is calculated by the fused
+    "cnn_reference.pe()". The result is identical to "numpy_inference()".
+
+    >>> from fp_helper import Bitwidth, random_fixed_array, v_to_fixedint
+    >>> model = model_zoo.conv_2x_3x1_1x1_max_2x2_padding()
+    >>> shape = [2] + parse_param.get_input_shape(model)[1:]
+    >>> input_ = random_fixed_array(shape, Bitwidth(8, 8, 0), signed=False)
+    >>> np.array_equal(v_to_fixedint(pe_inference(model, input_)),
+    ...                v_to_fixedint(numpy_inference(model, input_)))
+    True
+    """
+    context = get_context(onnx_model)
+    param = parse_param.parse_param(context)
+    if any(node.op_type == "Conv" for node in context.nodes):
+        raise NotSupportedError("Layer Conv not supported.")
+
+    next_input = input_
+    conv_nodes = context.get_nodes("QLinearConv")
+    for pelem, node in enumerate(conv_nodes):
+        weights, bias, _ = get_conv_param(node, context.weights_dict)
+        pe_param = {key: param[key][pelem] for key in (
+            "relu", "leaky_relu", "pad", "conv_kernel", "conv_stride",
+            "pool_kernel", "pool_stride", "bitwidth")}
+        next_input = cnn_reference.pe(next_input, weights.to_object(),
+                                      bias.to_object(), pe_param)
+    return cnn_reference.avg_pool(next_input)
+
+
+def stream_conv_layer(node, weights_dict: Mapping,
+                      rows: Iterable[np.ndarray], format_in: Tuple[int, int],
+                      signed: bool) -> Tuple[Iterable[np.ndarray],
+                                             Tuple[int, int], bool]:
+    """Set up the streaming zero padding and convolution of a
+    "QLinearConv" node. Return the output rows, their format and whether
+    they are signed."""
+    params = parse_param.parse_node_attributes(node)
+    pad = parse_param.get_pad(params)
+    if pad:
+        rows = cnn_stream.stream_zero_pad(rows, pad)
+
+    ksize, stride = parse_param.get_kernel_params(params)
+    weights, bias, bitwidth_out = get_conv_param(node, weights_dict)
+    signed = signed or weights.signed or bias.signed
+    rows = cnn_stream.stream_conv(
+        rows, weights.data, bias.data, (format_in[1], weights.frac_bits),
+        (ksize, stride), bitwidth_out, signed)
+    return rows, bitwidth_out, signed
+
+
+def stream_inference(onnx_model, rows: Iterable[np.ndarray],
+                     format_in: Tuple[int, int],
+                     signed: bool = False) -> Iterator[np.ndarray]:
+    """Calculate the inference of a given input with a given model in a
+    streaming manner. The input is given as raw integer rows of the format
+    "format_in", for example by "cnn_stream.image_to_rows()". The output
+    rows are yielded as soon as they are complete (see "cnn_stream").
+
+    >>> from cnn_stream import image_to_rows
+    >>> from fp_helper import Bitwidth, random_fixed_array
+    >>> model = model_zoo.conv_2x_3x1_1x1_max_2x2_padding()
+    >>> shape = [2] + parse_param.get_input_shape(model)[1:]
+    >>> input_ = random_fixed_array(shape, Bitwidth(8, 8, 0), signed=False)
+    >>> rows = image_to_rows(FixedArray.from_object(input_).data)
+    >>> output = list(stream_inference(model, rows, (8, 0)))
+    >>> reference = FixedArray.from_object(numpy_inference(model, input_))
+    >>> len(output), np.array_equal(output[0], reference.data)
+    (1, True)
+    """
+    context = get_context(onnx_model)
+    weights_dict = context.weights_dict
+
+    next_rows: Iterable[np.ndarray] = rows
+    format_ = format_in
+    for node in context.nodes:
+        params = parse_param.parse_node_attributes(node)
+
+        if node.op_type == "Conv":
+            raise NotSupportedError(f"Layer {node.op_type} not supported.")
+        if node.op_type == "QLinearConv":
+            next_rows, format_, signed = stream_conv_layer(
+                node, weights_dict, next_rows, format_, signed)
+        elif node.op_type == "MaxPool":
+            ksize, stride = parse_param.get_kernel_params(params)
+            next_rows = cnn_stream.stream_max_pool(next_rows, ksize, stride)
+        elif node.op_type == "GlobalAveragePool":
+            next_rows = cnn_stream.stream_avg_pool(next_rows, format_, signed)
+        elif node.op_type == "Relu":
+            next_rows = cnn_stream.stream_relu(next_rows)
+        elif node.op_type == "LeakyRelu":
+            next_rows = cnn_stream.stream_leaky_relu(
+                next_rows, cnn_reference.LEAKY_RELU_ALPHA, format_, signed)
+    return iter(next_rows)
+
+
 if __name__ == "__main__":
     # save arbitrary cnn model to file in onnx format
     MODEL_DEF = model_zoo.conv_3x1_1x1_max_2x2()
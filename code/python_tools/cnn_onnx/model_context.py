@@ -0,0 +1,60 @@
+"""Shared context of an ONNX model. The model is deserialized only once and
+the nodes and initializers are indexed. The initializers are converted to
+numpy arrays lazily, when they are accessed the first time. A context can
+be passed to all tools, which take a model."""
+
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Union
+
+import numpy as np
+import onnx
+from onnx import numpy_helper
+
+
+class LazyInitializers(Mapping):
+    """Read only mapping from the initializer names to numpy arrays. Each
+    initializer is converted only once."""
+    def __init__(self, initializers: list) -> None:
+        self._protos = {init.name: init for init in initializers}
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            self._arrays[name] = numpy_helper.to_array(self._protos[name])
+        return self._arrays[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._protos)
+
+    def __len__(self) -> int:
+        return len(self._protos)
+
+
+class ModelContext:
+    """Represents a loaded ONNX model, which can be shared between the
+    tools. It can be created from a path or from an already loaded model.
+
+    >>> from cnn_onnx import model_zoo
+    >>> context = ModelContext(model_zoo.conv_3x1_1x1_max_2x2())
+    >>> len(context.get_nodes("QLinearConv"))
+    2
+    """
+    # It mainly holds the shared data of the model.
+    # pylint: disable=too-few-public-methods
+    def __init__(self, model: Union[str, onnx.ModelProto]) -> None:
+        self.path = model if isinstance(model, str) else None
+        self.net = onnx.load(model) if isinstance(model, str) else model
+        self.nodes = list(self.net.graph.node)
+        self.weights_dict = LazyInitializers(self.net.graph.initializer)
+
+    def get_nodes(self, op_type: str) -> List[onnx.NodeProto]:
+        """Obtain all nodes of a specific type in the order of the graph."""
+        return [node for node in self.nodes if node.op_type == op_type]
+
+
+def get_context(
+        model: Union[str, onnx.ModelProto, ModelContext]) -> ModelContext:
+    """Obtain the context of a model. An existing context is reused."""
+    if isinstance(model, ModelContext):
+        return model
+    return ModelContext(model)
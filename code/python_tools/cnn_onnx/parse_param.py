@@ -3,13 +3,13 @@
 import argparse
 import json
 import math
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 import warnings
 
 import onnx
-from onnx import numpy_helper
 
 from common import CnnArchitectureError, InconsistencyError, NotSupportedError
+from cnn_onnx.model_context import ModelContext, get_context
 
 # https://github.com/onnx/onnx/blob/master/onnx/onnx.proto
 TYPE_TO_STR = {
@@ -96,12 +96,13 @@ class ProcessingElement:
         return self.param
 
 
-def parse_param(model: str) -> dict:
-    """Parse an ONNX model into a python dictionary."""
+def parse_param(model: Union[str, onnx.ModelProto, ModelContext]) -> dict:
+    """Parse an ONNX model into a python dictionary. The model can be given
+    as path, loaded model or "ModelContext"."""
     # pylint: disable=too-many-branches
-    net = onnx.load(model)
+    context = get_context(model)
 
-    input_shape = get_input_shape(net)
+    input_shape = get_input_shape(context.net)
     if input_shape[1] not in [1, 3]:
         raise NotSupportedError(
             f"Only one or three input channel supported. "
@@ -124,11 +125,8 @@ def parse_param(model: str) -> dict:
     pes: List[Optional[ProcessingElement]] = []
     pelem: Optional[ProcessingElement] = None
 
-    weights_dict = {}
-    for init in net.graph.initializer:
-        weights_dict[init.name] = numpy_helper.to_array(init)
-
-    for node in net.graph.node:
+    weights_dict = context.weights_dict
+    for node in context.nodes:
         params = parse_node_attributes(node)
 
         if node.op_type in ["QuantizeLinear", "DequantizeLinear"]:
@@ -12,8 +12,8 @@ import numpy as np
 from common import CnnArchitectureError, NotSupportedError
 from cnn_onnx import parse_param
 from cnn_onnx import graph_generator as gg
-from fp_helper import to_fixed_point_array, v_to_fixedint
 from fp_helper import is_power_of_two, v_is_power_of_two
+from weights_cache import quantize_cached
 
 
 def get_integer_width(val: Union[int, float], max_bitwidth: int = 8) -> int:
@@ -43,14 +43,13 @@ def analyze_and_quantize(original_weights, original_bias,
     print("stats: ", max_val, min_val, highest_val)
 
     # quantize the weights
-    quantized_weights = to_fixed_point_array(
-        original_weights, int_bits=int_width, frac_bits=8 - int_width,
-        aggressive=aggressive)
-    quantized_bias = to_fixed_point_array(
-        original_bias, int_bits=int_width, frac_bits=8 - int_width,
-        aggressive=aggressive)
-    quantized_weights_int = v_to_fixedint(quantized_weights)
-    quantized_bias_int = v_to_fixedint(quantized_bias)
+    fixed_weights = quantize_cached(
+        original_weights, int_width, 8 - int_width, aggressive=aggressive)
+    fixed_bias = quantize_cached(
+        original_bias, int_width, 8 - int_width, aggressive=aggressive)
+    quantized_weights = fixed_weights.to_object()
+    quantized_weights_int = fixed_weights.to_fixedint()
+    quantized_bias_int = fixed_bias.to_fixedint()
     print("average error per weight:",
           np.mean(np.abs(original_weights - quantized_weights)))
     avg_val = np.mean(np.abs(quantized_weights))
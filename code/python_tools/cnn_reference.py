@@ -2,58 +2,138 @@
 CNN implementation in hardware without installing a big CNN framework
 Furthermore the fixed point functionality is implemented."""
 
-from typing import Tuple
+from functools import lru_cache
+from typing import Dict, Tuple, Union
 
 from fpbinary import FpBinary, OverflowEnum, RoundingEnum
 import numpy as np
 
-from common import InconsistencyError, NotSupportedError
-from fp_helper import to_fixed_point_array
+from common import InconsistencyError
+from fp_helper import FixedArray, resize_raw
 
 
-def avg_pool(array_in):
-    """Global average pooling layer."""
-    _, _, width, height = array_in.shape
-    sample = array_in.item(0)
+# format of the reciprocal in "pool_ave.vhd" (unsigned)
+RECIPROCAL_FORMAT = (1, 16)
 
+
+@lru_cache(maxsize=None)
+def avg_pool_reciprocal(height: int, width: int) -> int:
+    """Obtain the raw integer field of the reciprocal of the pooling area.
+    The result is cached, since it only depends on the input size."""
     # calculate reciprocal for average manually, because else factor would
     # be too different
-    reciprocal = to_fixed_point_array(
-        np.array(1. / (width * height)), int_bits=1, frac_bits=16,
-        signed=False)
-    array_out = np.sum(np.sum(array_in, axis=2), axis=2) * reciprocal
-    # TODO: replace for loop
-    for value in np.nditer(array_out, flags=["refs_ok"]):
-        value.item().resize(
-            sample.format, OverflowEnum.sat, RoundingEnum.near_even)
-    return array_out
+    return int(FixedArray.from_value(
+        np.array(1. / (height * width)), *RECIPROCAL_FORMAT,
+        signed=False).data)
+
+
+def avg_pool_int(raw_in, format_: Tuple[int, int], signed: bool = True):
+    """Global average pooling layer on raw integer fields. The channels are
+    summed up, multiplied by the reciprocal and resized to the input format
+    at once."""
+    _, _, height, width = raw_in.shape
+    array_out = (np.sum(raw_in.astype(np.int64), axis=(2, 3)) *
+                 avg_pool_reciprocal(height, width))
+    return resize_raw(array_out, format_[1] + RECIPROCAL_FORMAT[1], format_,
+                      signed)
+
+
+def avg_pool(array_in):
+    """Global average pooling layer. The output shape is (batch, channel).
+    The calculation is done on the raw integer fields
+    (see "avg_pool_int()")."""
+    fixed_in = FixedArray.from_object(array_in)
+    return FixedArray(
+        avg_pool_int(fixed_in.data, fixed_in.format, fixed_in.signed),
+        *fixed_in.format, fixed_in.signed).to_object()
+
+
+def sliding_windows(array_in, ksize: int, stride: int):
+    """Obtain a strided view of all windows, without copying the input.
+    The shape is (batch, channel, row_out, col_out, ksize, ksize). Only
+    windows, where the full kernel fits, are provided."""
+    return np.lib.stride_tricks.sliding_window_view(
+        array_in, (ksize, ksize), axis=(2, 3))[:, :, ::stride, ::stride]
+
+
+def window_stream(array_in, ksize: int, stride: int, repeat: int = 1):
+    """Obtain all windows in the order of the "window_ctrl" output. The
+    windows are ordered by row and column. Each window is repeated "repeat"
+    times (once per output channel), like in "channel_repeater.vhd". The
+    shape is (batch, row_out * col_out, repeat, channel, ksize * ksize).
+    The windows are copied once, the repetitions are a broadcasted view.
+
+    >>> window_stream(np.arange(8).reshape(1, 2, 2, 2), 2, 2, 2)[0, 0]
+    array([[[0, 1, 2, 3],
+            [4, 5, 6, 7]],
+    <BLANKLINE>
+           [[0, 1, 2, 3],
+            [4, 5, 6, 7]]])
+    """
+    windows = sliding_windows(array_in, ksize, stride)
+    batch, channel, row_out, col_out = windows.shape[:4]
+    # shape: batch, row_out * col_out, channel, ksize * ksize
+    windows = np.transpose(windows, (0, 2, 3, 1, 4, 5)).reshape(
+        batch, row_out * col_out, channel, ksize * ksize)
+    return np.broadcast_to(
+        windows[:, :, None],
+        (batch, row_out * col_out, repeat, channel, ksize * ksize))
+
+
+def pool_windows(array_in, ksize: int, stride: int):
+    """Obtain all pooling windows. The shape is
+    (batch, channel, row_out, col_out, ksize * ksize)."""
+    windows = sliding_windows(array_in, ksize, stride)
+    return windows.reshape(windows.shape[:4] + (-1,))
+
+
+def max_pool_int(raw_in, ksize: int, stride: int):
+    """Local maximum pooling layer on raw integer fields."""
+    return np.amax(pool_windows(raw_in, ksize, stride), axis=4)
 
 
 def max_pool(array_in, ksize: int, stride: int):
-    """Local maximum pooling layer."""
-    # pylint: disable=too-many-locals
-    batch, channel, height, width = array_in.shape
+    """Local maximum pooling layer. The maximum positions are searched on
+    the raw integer fields at once. The corresponding fixed point objects
+    of the input are selected afterwards, so that no new objects have to be
+    created."""
+    raw_in = FixedArray.from_object(array_in).data
+    index = np.argmax(pool_windows(raw_in, ksize, stride), axis=4)
+    return np.take_along_axis(
+        pool_windows(array_in, ksize, stride), index[..., None], axis=4
+    )[..., 0]
 
-    if batch != 1:
-        raise NotSupportedError(f"Batch size != 1 not supported. Got {batch}.")
-    array_out = np.empty((1, channel, int((height - ksize) / stride) + 1,
-                          int((width - ksize) / stride) + 1), dtype=object)
-    # - (stride - 1) to provide only outputs, where the full kernel fits
-    max_height = height - (ksize - stride) - (stride - 1)
-    max_width = width - (ksize - stride) - (stride - 1)
-    for row_out, row_in in enumerate(range(0, max_height, stride)):
-        for col_out, col_in in enumerate(range(0, max_width, stride)):
-            roi = array_in[0, :, row_in:row_in+ksize, col_in:col_in+ksize]
-            array_out[0, :, row_out, col_out] = np.amax(
-                roi.reshape(channel, -1), axis=1)
-    return array_out
+
+def conv_int(raw_in, raw_weights, raw_bias, frac_bits: Tuple[int, int],
+             param: Tuple[int, int], bitwidth_out: Tuple[int, int],
+             signed: bool = True):
+    """Convolution layer on raw integer fields. The fractional bits of input
+    and weights are given by "frac_bits". The bias shares the format of the
+    weights. All windows and channels are calculated at once by a tensordot
+    of the strided input windows (im2col) and the kernel."""
+    # pylint: disable=too-many-arguments
+    ksize, stride = param
+    frac_bits_in, frac_bits_weights = frac_bits
+
+    # shape: batch, channel, row_out, col_out, ksize, ksize
+    windows = sliding_windows(raw_in.astype(np.int64), ksize, stride)
+    # shape: batch, row_out, col_out, channel_out
+    products = np.tensordot(
+        windows, raw_weights.astype(np.int64), axes=([1, 4, 5], [1, 2, 3]))
+    # align the bias to the fractional bits of the products
+    bias = raw_bias.astype(np.int64) << frac_bits_in
+    array_out = np.transpose(products, (0, 3, 1, 2)) + bias[:, None, None]
+    return resize_raw(array_out, frac_bits_in + frac_bits_weights,
+                      bitwidth_out, signed)
 
 
 def conv(array_in, weights, bias, param: Tuple[int, int],
-         bitwidth_out: Tuple[int, int]):
-    """Convolution layer."""
+         bitwidth_out: Tuple[int, int], integer: bool = True):
+    """Convolution layer. By default, the calculation is done on the raw
+    integer fields (see "conv_int()"). Set "integer" to False to calculate
+    it directly on the fixed point objects. Both variants are bit-exact."""
     # used more locals for better readability
-    # pylint: disable=too-many-locals
+    # pylint: disable=too-many-arguments,too-many-locals
     ksize, stride = param
     batch, channel_in, height, width = array_in.shape
     channel_out, channel_in_w, ksize_w1, ksize_w2 = weights.shape
@@ -66,20 +146,35 @@ def conv(array_in, weights, bias, param: Tuple[int, int],
     if not ksize_w1 == ksize_w2 == ksize:
         raise InconsistencyError(
             f"Kernel size doesn't fit. !({ksize_w1} == {ksize_w2} == {ksize}.")
-    if batch != 1:
-        raise NotSupportedError(f"Batch size != 1 not supported. Got {batch}.")
 
-    array_out = np.empty((1, channel_out, int((height - ksize) / stride) + 1,
+    if integer:
+        fixed_in = FixedArray.from_object(array_in)
+        fixed_weights = FixedArray.from_object(weights)
+        fixed_bias = FixedArray.from_object(bias)
+        if fixed_bias.format != fixed_weights.format:
+            raise InconsistencyError(
+                f"Bias and weights format don't fit. "
+                f"{fixed_bias.format} != {fixed_weights.format}")
+        signed = fixed_in.signed or fixed_weights.signed or fixed_bias.signed
+        raw_out = conv_int(
+            fixed_in.data, fixed_weights.data, fixed_bias.data,
+            (fixed_in.frac_bits, fixed_weights.frac_bits),
+            param, bitwidth_out, signed)
+        return FixedArray(raw_out, *bitwidth_out, signed).to_object()
+
+    array_out = np.empty((batch, channel_out,
+                          int((height - ksize) / stride) + 1,
                           int((width - ksize) / stride) + 1), dtype=object)
     # - (stride - 1) to provide only outputs, where the full kernel fits
     max_height = height - (ksize - stride) - (stride - 1)
     max_width = width - (ksize - stride) - (stride - 1)
     for row_out, row_in in enumerate(range(0, max_height, stride)):
         for col_out, col_in in enumerate(range(0, max_width, stride)):
-            roi = array_in[0, :, row_in:row_in+ksize, col_in:col_in+ksize]
+            roi = array_in[:, :, row_in:row_in+ksize, col_in:col_in+ksize]
             for ch_out in range(channel_out):
-                array_out[0, ch_out, row_out, col_out] = (
-                    np.sum(roi * weights[ch_out]) + bias[ch_out])
+                array_out[:, ch_out, row_out, col_out] = (
+                    np.sum(roi * weights[ch_out], axis=(1, 2, 3)) +
+                    bias[ch_out])
 
     # TODO: replace for loop
     for value in np.nditer(array_out, flags=["refs_ok"]):
@@ -88,49 +183,160 @@ def conv(array_in, weights, bias, param: Tuple[int, int],
     return array_out
 
 
-def zero_pad(array_in, size: int = 1):
-    """Zero padding with same padding at each edge."""
+def get_pad_width(size: Union[int, Tuple[int, int, int, int]]):
+    """Obtain the pad width of all axes in the format of "np.pad". The size
+    is either an integer, which is used at each edge, or a tuple in the
+    order of the ONNX "pads" attribute: (top, left, bottom, right).
+
+    >>> get_pad_width(1)
+    ((0, 0), (0, 0), (1, 1), (1, 1))
+    >>> get_pad_width((0, 1, 2, 3))
+    ((0, 0), (0, 0), (0, 2), (1, 3))
+    """
+    if isinstance(size, int):
+        size = (size,) * 4
+    top, left, bottom, right = size
+    return ((0, 0), (0, 0), (top, bottom), (left, right))
+
+
+def zero_pad_int(raw_in, size: Union[int, Tuple[int, int, int, int]] = 1):
+    """Zero padding on raw integer fields."""
+    return np.pad(raw_in, get_pad_width(size))
+
+
+def zero_pad(array_in, size: Union[int, Tuple[int, int, int, int]] = 1):
+    """Zero padding. See "get_pad_width()" for the supported sizes. All
+    padded values refer to a single zero object, instead of creating a new
+    object for each value."""
     sample = array_in.item(0)
-    # TODO: figure out why np.pad doesn't work
-    # c = np.pad(array_in, ((0, 0), (0, 0), (size, size), (size, size)),
-    #            "constant", constant_values=FpBinary(...))
-    shape_out = (array_in.shape[0], array_in.shape[1],
-                 array_in.shape[2] + 2*size, array_in.shape[3] + 2*size)
-    array_out = to_fixed_point_array(
-        np.zeros(shape_out), format_inst=sample, signed=sample.is_signed)
-    array_out[:, :, size:-size, size:-size] = array_in
-    return array_out
+    zero = FpBinary(*sample.format, signed=sample.is_signed, value=0)
+    return np.pad(array_in, get_pad_width(size), constant_values=zero)
+
+
+def relu_int(raw_in):
+    """Rectified linear unit activation on raw integer fields."""
+    return np.maximum(raw_in, 0)
 
 
 def relu(array_in):
-    """Rectified linear unit activation."""
+    """Rectified linear unit activation. The negative values are replaced by
+    a single zero object, instead of creating a new object for each value."""
     sample = array_in.item(0)
-    array_out = to_fixed_point_array(
-        np.zeros(array_in.shape), format_inst=sample,
-        signed=sample.is_signed)
-    return np.where(array_in > 0, array_in, array_out)
+    zero = FpBinary(*sample.format, signed=sample.is_signed, value=0)
+    array_out = array_in.copy()
+    array_out[FixedArray.from_object(array_in).data < 0] = zero
+    return array_out
+
+
+def leaky_relu_int(raw_in, alpha: Tuple[int, int], format_: Tuple[int, int],
+                   signed: bool = True):
+    """Leaky rectified linear unit activation on raw integer fields. "alpha"
+    is given as (raw value, fractional bits). The negative values are
+    multiplied by alpha and resized to the input format. For the hardware
+    alpha of 0.125 this corresponds to an arithmetic shift by 3 bit."""
+    alpha_raw, alpha_frac_bits = alpha
+    leaky = resize_raw(raw_in * alpha_raw, format_[1] + alpha_frac_bits,
+                       format_, signed)
+    return np.where(raw_in < 0, leaky, raw_in)
 
 
 def leaky_relu(array_in, alpha: FpBinary):
-    """Leaky rectified linear unit activation."""
-    sample = array_in.item(0)
+    """Leaky rectified linear unit activation. The calculation is done on
+    the raw integer fields (see "leaky_relu_int()"). Only for the negative
+    values new objects are created."""
+    fixed_in = FixedArray.from_object(array_in)
+    alpha_frac_bits = alpha.format[1]
+    alpha_raw = int(float(alpha) * 2 ** alpha_frac_bits)
+    raw_out = leaky_relu_int(fixed_in.data, (alpha_raw, alpha_frac_bits),
+                             fixed_in.format, fixed_in.signed)
+
+    negative = fixed_in.data < 0
+    array_out = array_in.copy()
+    if np.any(negative):
+        array_out[negative] = FixedArray(
+            raw_out[negative], *fixed_in.format, fixed_in.signed).to_object()
+    return array_out
+
+
+# leaky relu alpha of "relu.vhd" as (raw value, fractional bits): 0.125
+LEAKY_RELU_ALPHA = (1, 3)
+
+
+def pe_int(raw_in, raw_weights, raw_bias, param: dict, signed: bool = True):
+    """Processing element (zero padding, convolution, activation and maximum
+    pooling) on raw integer fields, fused like in "pe.vhd". "param" contains
+    the parameter of a single PE, like "ProcessingElement.get_param()".
+    The output is calculated row by row. Only the convolution rows of the
+    current pooling window are kept, instead of the full intermediate
+    feature maps."""
+    # pylint: disable=too-many-locals
+    batch, _, height, width = raw_in.shape
+    ksize, stride, pad = (
+        param["conv_kernel"], param["conv_stride"], param["pad"])
+    _, frac_bits_in, frac_bits_out, _, frac_bits_weights = param["bitwidth"]
+    bitwidth_out = (param["bitwidth"][0] - frac_bits_out, frac_bits_out)
+
+    def conv_row(row: int):
+        """Calculate a single row of the activated convolution output."""
+        top, bottom = row * stride - pad, row * stride - pad + ksize
+        rows_in = zero_pad_int(
+            raw_in[:, :, max(top, 0):min(bottom, height)],
+            (max(-top, 0), pad, max(bottom - height, 0), pad))
+        row_out = conv_int(
+            rows_in, raw_weights, raw_bias, (frac_bits_in, frac_bits_weights),
+            (ksize, stride), bitwidth_out, signed)
+        if param["leaky_relu"]:
+            return leaky_relu_int(row_out, LEAKY_RELU_ALPHA, bitwidth_out,
+                                  signed)
+        if param["relu"]:
+            return relu_int(row_out)
+        return row_out
+
+    conv_height = (height + 2 * pad - ksize) // stride + 1
+    conv_width = (width + 2 * pad - ksize) // stride + 1
+    pool_ksize, pool_stride = param["pool_kernel"], param["pool_stride"]
+    if not pool_ksize:
+        pool_ksize, pool_stride = 1, 1
+    array_out = np.empty(
+        (batch, raw_weights.shape[0],
+         (conv_height - pool_ksize) // pool_stride + 1,
+         (conv_width - pool_ksize) // pool_stride + 1), dtype=np.int64)
+
+    # convolution rows of the current pooling window, indexed by row
+    conv_rows: Dict[int, np.ndarray] = {}
+    for row_out in range(array_out.shape[2]):
+        first_row = row_out * pool_stride
+        for row in list(conv_rows):
+            if row < first_row:
+                del conv_rows[row]
+        for row in range(first_row, first_row + pool_ksize):
+            if row not in conv_rows:
+                conv_rows[row] = conv_row(row)
+        array_out[:, :, row_out:row_out+1] = max_pool_int(
+            np.concatenate([conv_rows[row] for row in sorted(conv_rows)],
+                           axis=2),
+            pool_ksize, pool_stride)
+    return array_out
+
 
-    # TODO: look for a simpler conversion
-    # https://github.com/smlgit/fpbinary/issues/9
-    array_out = np.empty((np.product(array_in.shape),), dtype=object)
-    list_out = []
-    for value in array_in.flat:
-        if value < 0:
-            value_leaky = value * alpha
-            value_leaky.resize(
-                sample.format, OverflowEnum.sat, RoundingEnum.near_even)
-        else:
-            value_leaky = value
-        list_out.append(value_leaky)
-    array_out[:] = list_out
-    return array_out.reshape(array_in.shape)
+def pe(array_in, weights, bias, param: dict):
+    """Processing element. See "pe_int()" for details. The result is
+    identical to the layer by layer calculation, which is checked by
+    "cnn_onnx.inference.pe_inference()"."""
+    fixed_in = FixedArray.from_object(array_in)
+    fixed_weights = FixedArray.from_object(weights)
+    fixed_bias = FixedArray.from_object(bias)
+    signed = fixed_in.signed or fixed_weights.signed or fixed_bias.signed
+    frac_bits_out = param["bitwidth"][2]
+    return FixedArray(
+        pe_int(fixed_in.data, fixed_weights.data, fixed_bias.data, param,
+               signed),
+        param["bitwidth"][0] - frac_bits_out, frac_bits_out, signed
+    ).to_object()
 
 
 def flatten(array_in):
-    """Converts an array to a stream based vector (B > CH > H > W)."""
-    return np.transpose(array_in, (0, 2, 3, 1)).flatten()[None]
+    """Converts an array to a stream based vector (H > W > CH) per batch
+    element. The output shape is (batch, height * width * channel)."""
+    return np.transpose(array_in, (0, 2, 3, 1)).reshape(
+        array_in.shape[0], -1)
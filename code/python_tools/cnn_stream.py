@@ -0,0 +1,125 @@
+"""Streaming variant of the reference implementation. Each layer consumes the
+rows of its input feature map from an iterator and yields the rows of its
+output feature map as soon as they are complete. Like the line buffers in
+"window_ctrl", only as many rows as the kernel size are kept per layer.
+
+A row is a raw integer array of the shape (batch, channel, 1, width)."""
+
+from collections import deque
+from typing import Iterable, Iterator, Tuple, Union
+
+import numpy as np
+
+from cnn_reference import (
+    RECIPROCAL_FORMAT, avg_pool_reciprocal, conv_int, leaky_relu_int,
+    max_pool_int, relu_int)
+from fp_helper import resize_raw
+
+
+def image_to_rows(raw_in) -> Iterator[np.ndarray]:
+    """Split a raw integer feature map into its rows."""
+    for row in range(raw_in.shape[2]):
+        yield raw_in[:, :, row:row+1]
+
+
+def rows_to_image(rows: Iterable[np.ndarray]) -> np.ndarray:
+    """Concatenate rows to a raw integer feature map."""
+    return np.concatenate(list(rows), axis=2)
+
+
+def stream_windows(rows: Iterable[np.ndarray], ksize: int,
+                   stride: int) -> Iterator[np.ndarray]:
+    """Line buffer. Yield the last "ksize" rows, stacked to an array of the
+    shape (batch, channel, ksize, width), whenever a new window row starts.
+
+    >>> rows = image_to_rows(np.arange(5)[None, None, :, None])
+    >>> [window.flatten().tolist() for window in stream_windows(rows, 3, 2)]
+    [[0, 1, 2], [2, 3, 4]]
+
+    The windows are in the order of the "window_ctrl" output:
+
+    >>> from cnn_reference import window_stream
+    >>> raw_in = np.arange(2 * 6 * 5).reshape(1, 2, 6, 5)
+    >>> streamed = np.concatenate([
+    ...     window_stream(lines, 3, 2)
+    ...     for lines in stream_windows(image_to_rows(raw_in), 3, 2)], axis=1)
+    >>> np.array_equal(streamed, window_stream(raw_in, 3, 2))
+    True
+    """
+    lines: deque = deque(maxlen=ksize)
+    for index, row in enumerate(rows):
+        lines.append(row)
+        if index >= ksize - 1 and (index - ksize + 1) % stride == 0:
+            yield np.concatenate(lines, axis=2)
+
+
+def stream_zero_pad(rows: Iterable[np.ndarray],
+                    size: Union[int, Tuple[int, int, int, int]] = 1
+                    ) -> Iterator[np.ndarray]:
+    """Zero padding. See "cnn_reference.get_pad_width()" for the supported
+    sizes."""
+    if isinstance(size, int):
+        size = (size,) * 4
+    top, left, bottom, right = size
+    padded = None
+    for index, row in enumerate(rows):
+        padded = np.pad(row, ((0, 0), (0, 0), (0, 0), (left, right)))
+        if index == 0:
+            for _ in range(top):
+                yield np.zeros_like(padded)
+        yield padded
+    if padded is not None:
+        for _ in range(bottom):
+            yield np.zeros_like(padded)
+
+
+def stream_conv(rows: Iterable[np.ndarray], raw_weights, raw_bias,
+                frac_bits: Tuple[int, int], param: Tuple[int, int],
+                bitwidth_out: Tuple[int, int],
+                signed: bool = True) -> Iterator[np.ndarray]:
+    """Convolution layer. See "cnn_reference.conv_int()" for details."""
+    # pylint: disable=too-many-arguments
+    ksize, stride = param
+    for window in stream_windows(rows, ksize, stride):
+        yield conv_int(window, raw_weights, raw_bias, frac_bits, param,
+                       bitwidth_out, signed)
+
+
+def stream_max_pool(rows: Iterable[np.ndarray], ksize: int,
+                    stride: int) -> Iterator[np.ndarray]:
+    """Local maximum pooling layer."""
+    for window in stream_windows(rows, ksize, stride):
+        yield max_pool_int(window, ksize, stride)
+
+
+def stream_relu(rows: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+    """Rectified linear unit activation."""
+    for row in rows:
+        yield relu_int(row)
+
+
+def stream_leaky_relu(rows: Iterable[np.ndarray], alpha: Tuple[int, int],
+                      format_: Tuple[int, int],
+                      signed: bool = True) -> Iterator[np.ndarray]:
+    """Leaky rectified linear unit activation. See
+    "cnn_reference.leaky_relu_int()" for details."""
+    for row in rows:
+        yield leaky_relu_int(row, alpha, format_, signed)
+
+
+def stream_avg_pool(rows: Iterable[np.ndarray], format_: Tuple[int, int],
+                    signed: bool = True) -> Iterator[np.ndarray]:
+    """Global average pooling layer. The rows get accumulated, so that only
+    a single row is kept. The result of the shape (batch, channel) is
+    yielded after the last row. See "cnn_reference.avg_pool_int()" for
+    details."""
+    row_sum, height = None, 0
+    for row in rows:
+        row_sum = row.astype(np.int64) if row_sum is None else row_sum + row
+        height += 1
+    if row_sum is None:
+        return
+    _, _, _, width = row_sum.shape
+    yield resize_raw(
+        np.sum(row_sum, axis=(2, 3)) * avg_pool_reciprocal(height, width),
+        format_[1] + RECIPROCAL_FORMAT[1], format_, signed)
@@ -0,0 +1,212 @@
+"""Summarize the cycle counts, which are exported by the testbench of the
+"top" module (see "sim/vunit/top/run.py"). Each CSV file contains one line
+per image with the cycles of the start, the last input, the first valid
+output and the finish signal. "isl_start" resets the pipeline, so the
+images can't overlap. The next image is started after the previous image
+is finished. The difference between two starts is the latency plus the
+restart of the pipeline, which limits the frame rate.
+
+Next to each CSV file, the testbench stores the model and the
+parallelization of the config in a JSON file. They are used to compare the
+cycles with the performance model and to fit its constants."""
+
+import argparse
+import csv
+from dataclasses import dataclass
+import glob
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from common import InconsistencyError
+from cnn_onnx import parse_param
+import performance_model
+
+
+@dataclass
+class CycleSummary:
+    """Mean cycles of all images of a simulation."""
+    images: int
+    latency: float
+    first_output: float
+    input_cycles: float
+    input_idle: float
+    start_to_start: float
+    fps: Optional[float] = None
+
+
+def load_cycles(path: str) -> Dict[str, np.ndarray]:
+    """Load the cycles of a CSV file. The columns are returned as arrays."""
+    with open(path, newline="") as infile:
+        rows = list(csv.DictReader(infile, skipinitialspace=True))
+    if not rows:
+        raise InconsistencyError(f"No images in {path}.")
+    return {key: np.array([int(row[key]) for row in rows])
+            for key in rows[0]}
+
+
+def summarize(cycles: Dict[str, np.ndarray],
+              clock_frequency: Optional[float] = None) -> CycleSummary:
+    """Summarize the cycles of all images. With a single image, the cycles
+    from start to start can't be measured and the latency is used instead.
+    If the clock frequency (in Hz) is given, the frame rate gets
+    calculated.
+
+    >>> summary = summarize({
+    ...     "start": np.array([10, 110]), "last_input": np.array([60, 160]),
+    ...     "first_valid": np.array([90, 190]),
+    ...     "finish": np.array([100, 200])}, 100e6)
+    >>> summary.latency, summary.start_to_start, summary.fps
+    (90.0, 100.0, 1000000.0)
+    """
+    start = cycles["start"]
+    start_to_start = float(
+        np.mean(np.diff(start)) if start.size > 1 else
+        np.mean(cycles["finish"] - start))
+    fps = (None if clock_frequency is None else
+           clock_frequency / start_to_start)
+    return CycleSummary(
+        start.size,
+        float(np.mean(cycles["finish"] - start)),
+        float(np.mean(cycles["first_valid"] - start)),
+        float(np.mean(cycles["last_input"] - start)),
+        float(np.mean(cycles["finish"] - cycles["last_input"])),
+        start_to_start, fps)
+
+
+def compare(summary: CycleSummary,
+            estimation: performance_model.Performance) -> Dict[str, float]:
+    """Obtain the relative errors of the latency and the cycles per frame
+    (latency plus restart) of the performance model.
+
+    >>> summary = CycleSummary(2, 100., 90., 50., 50., 110.)
+    >>> estimation = performance_model.Performance([], 0, 80, 105, 110)
+    >>> compare(summary, estimation)
+    {'latency_error': 0.05, 'start_to_start_error': 0.0}
+    """
+    return {
+        "latency_error": performance_model.compare(
+            estimation.latency, int(summary.latency)),
+        "start_to_start_error": performance_model.compare(
+            estimation.cycles_per_frame, int(summary.start_to_start)),
+    }
+
+
+def check(path: str, estimation: performance_model.Performance,
+          tolerance: float = performance_model.TOLERANCE) -> bool:
+    """Check the cycles of a simulation against the performance model. The
+    check fails, if any relative error exceeds the tolerance."""
+    passed = True
+    for key, error in compare(summarize(load_cycles(path)),
+                              estimation).items():
+        if abs(error) > tolerance:
+            print(f"{key} of {path} exceeds the tolerance. "
+                  f"|{error:.3f}| > {tolerance}")
+            passed = False
+    return passed
+
+
+def save_config(path: str, model: str, parallel_ch: List[int]) -> None:
+    """Store the model and the parallelization of a CSV file."""
+    with open(os.path.splitext(path)[0] + ".json", "w") as outfile:
+        json.dump({"model": model, "parallel_ch": parallel_ch}, outfile)
+
+
+def load_config(path: str) -> Optional[Tuple[str, List[int]]]:
+    """Load the model and the parallelization of a CSV file, if they were
+    stored by the testbench."""
+    config_path = os.path.splitext(path)[0] + ".json"
+    if not os.path.isfile(config_path):
+        return None
+    with open(config_path) as infile:
+        config = json.load(infile)
+    return config["model"], config["parallel_ch"]
+
+
+def fit(paths: List[str]) -> Dict[str, int]:
+    """Fit the constants of the performance model to the cycles of all CSV
+    files, which have a stored config."""
+    samples = []
+    for path in paths:
+        config = load_config(path)
+        if config is None:
+            continue
+        summary = summarize(load_cycles(path))
+        samples.append((parse_param.parse_param(config[0]), config[1],
+                        summary.latency, summary.start_to_start))
+    if not samples:
+        raise InconsistencyError("No cycles with a stored config found.")
+    return performance_model.fit_constants(samples)
+
+
+def report(summary: CycleSummary,
+           estimation: Optional[performance_model.Performance] = None
+           ) -> Dict[str, object]:
+    """Summarize the cycles in a dictionary. If an estimation of the
+    performance model is given, the relative errors are added (see
+    "compare()")."""
+    result: Dict[str, object] = {
+        "images": summary.images,
+        "latency": round(summary.latency, 2),
+        "first_output": round(summary.first_output, 2),
+        "input_cycles": round(summary.input_cycles, 2),
+        "input_idle": round(summary.input_idle, 2),
+        "start_to_start": round(summary.start_to_start, 2),
+    }
+    if summary.fps is not None:
+        result["fps"] = round(summary.fps, 2)
+    if estimation is not None:
+        result.update((key, round(error, 3)) for key, error in
+                      compare(summary, estimation).items())
+    return result
+
+
+def get_paths(paths: List[str]) -> List[str]:
+    """Obtain all CSV files. Directories are searched for CSV files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.csv"))))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    """Main function to summarize the cycles of the simulations."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", type=str, nargs="+",
+                        help="CSV files or directories of CSV files.")
+    parser.add_argument("--clock", type=float, default=100e6,
+                        help="Clock frequency in Hz.")
+    parser.add_argument("--model", type=str,
+                        help="Path to the model, to compare the cycles "
+                             "with the performance model. By default, the "
+                             "stored config of each CSV file is used.")
+    parser.add_argument("--parallel-ch", type=int, nargs="+",
+                        help="Parallelization of each PE.")
+    parser.add_argument("--fit", action="store_true",
+                        help="Fit the constants of the performance model.")
+    args = parser.parse_args()
+
+    paths = get_paths(args.paths)
+    if args.fit:
+        for key, val in fit(paths).items():
+            print(f"{key} = {val}")
+        return
+
+    for path in paths:
+        print(os.path.splitext(os.path.basename(path))[0])
+        config = ((args.model, args.parallel_ch) if args.model is not None
+                  else load_config(path))
+        estimation = (None if config is None else performance_model.estimate(
+            parse_param.parse_param(config[0]), config[1]))
+        summary = summarize(load_cycles(path), args.clock)
+        for key, val in report(summary, estimation).items():
+            print(f"  {key}: {val}")
+
+
+if __name__ == "__main__":
+    main()
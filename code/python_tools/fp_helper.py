@@ -3,12 +3,14 @@ for fpbinary as well as general functions."""
 
 from dataclasses import dataclass
 import math
+import operator
 from random import randint
 from typing import Optional, Tuple, Union
 
 import numpy as np
 
-from fpbinary import FpBinary
+from fpbinary import (
+    FpBinary, FpBinaryOverflowException, OverflowEnum, RoundingEnum)
 
 
 @dataclass
@@ -99,6 +101,77 @@ def to_fixed_point_array(array_in, from_value: bool = True,
     return array_out.reshape(array_in.shape)
 
 
+def round_raw(raw, shift: int, rounding=RoundingEnum.near_even):
+    """Shift raw two's complement integer fields by "shift" bits to the
+    right (to the left if negative). The dropped bits are rounded like
+    "FpBinary.resize()".
+
+    >>> round_raw(np.array([-7, -6, -5, 5, 6, 7, 100]), 2)
+    array([-2, -2, -1,  1,  2,  2, 25])
+    >>> round_raw(np.array([-7, -6, -5, 5, 6, 7]), 2,
+    ...           rounding=RoundingEnum.direct_zero)
+    array([-1, -1, -1,  1,  1,  1])
+    >>> round_raw(np.array([-3, 3]), -2)
+    array([-12,  12])
+    """
+    raw = np.asarray(raw, dtype=np.int64)
+    if shift <= 0:
+        return raw << -shift
+    quotient = raw >> shift
+    remainder = raw - (quotient << shift)
+    half = 1 << (shift - 1)
+    round_up = {
+        RoundingEnum.direct_neg_inf: False,
+        RoundingEnum.direct_zero: (remainder != 0) & (raw < 0),
+        RoundingEnum.near_pos_inf: remainder >= half,
+        RoundingEnum.near_zero: (
+            (remainder > half) | ((remainder == half) & (raw < 0))),
+        RoundingEnum.near_even: (
+            (remainder > half) |
+            ((remainder == half) & (quotient & 1 == 1))),
+    }[rounding]
+    return quotient + round_up
+
+
+def limit_raw(raw, format_out: Tuple[int, int], signed: bool = True,
+              overflow=OverflowEnum.sat):
+    """Limit raw two's complement integer fields to the range of the
+    output format, like "FpBinary.resize()".
+
+    >>> limit_raw(np.array([-3, 12, 100]), (3, 2), signed=False)
+    array([ 0, 12, 31])
+    >>> limit_raw(np.array([7, 8, 9]), (4, 0), overflow=OverflowEnum.wrap)
+    array([ 7, -8, -7])
+    """
+    total_bits = sum(format_out)
+    min_val, max_val = ((-2 ** (total_bits - 1), 2 ** (total_bits - 1) - 1)
+                        if signed else (0, 2 ** total_bits - 1))
+    if overflow == OverflowEnum.sat:
+        return np.clip(raw, min_val, max_val)
+    if overflow == OverflowEnum.wrap:
+        return (raw - min_val) % 2 ** total_bits + min_val
+    if np.any((raw < min_val) | (raw > max_val)):
+        raise FpBinaryOverflowException(
+            f"Value out of range for format {format_out}.")
+    return raw
+
+
+def resize_raw(raw, frac_bits_in: int, format_out: Tuple[int, int],
+               signed: bool = True):
+    """Resize raw two's complement integer fields to the output format.
+    Equivalent to "FpBinary.resize(format_out)" with saturation and
+    rounding to the nearest even value, but applied to the whole array at
+    once. Other modes are supported by "FixedArray.resize()".
+
+    >>> resize_raw(np.array([-7, -6, -5, 5, 6, 7, 100]), 2, (3, 0))
+    array([-2, -2, -1,  1,  2,  2,  3])
+    >>> resize_raw(np.array([-3, 3]), 0, (3, 2), signed=False)
+    array([ 0, 12])
+    """
+    return limit_raw(round_raw(raw, frac_bits_in - format_out[1]),
+                     format_out, signed)
+
+
 def is_power_of_two(val: Union[int, float]) -> bool:
     """Check whether a number is a power of two.
 
@@ -194,6 +267,151 @@ def v_power_of_two(val: Union[int, float]):
     return vector_power_of_two(val)
 
 
+@dataclass
+class FixedArray:
+    """Array of fixed point numbers. In contrast to an object array of
+    "FpBinary", the raw two's complement fields of all numbers are stored
+    in a single contiguous integer array. The format is shared by all
+    elements.
+
+    >>> a = FixedArray.from_value(np.array([-1.5, 0.25, 3.]), 4, 4)
+    >>> a
+    FixedArray(data=array([-24,   4,  48]), int_bits=4, frac_bits=4, \
+signed=True)
+    >>> a.to_fixedint()
+    array([232,   4,  48])
+    >>> a.to_binary_string()
+    array([b'11101000', b'00000100', b'00110000'], dtype='|S8')
+    >>> b = a * a + a
+    >>> b.format, b.to_float().tolist()
+    ((9, 8), [0.75, 0.3125, 12.0])
+    >>> b.resize((4, 2)).to_float()
+    array([0.75, 0.25, 7.75])
+    >>> FixedArray.from_object(a.to_object()) == a
+    True
+    """
+    data: np.ndarray
+    int_bits: int
+    frac_bits: int
+    signed: bool = True
+
+    def __post_init__(self):
+        self.data = np.ascontiguousarray(self.data, dtype=np.int64)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, FixedArray) and
+                self.format == other.format and
+                self.signed == other.signed and
+                np.array_equal(self.data, other.data))
+
+    def __add__(self, other: "FixedArray") -> "FixedArray":
+        """Full precision addition, like "FpBinary.__add__"."""
+        frac_bits = max(self.frac_bits, other.frac_bits)
+        return FixedArray(
+            (self.data << (frac_bits - self.frac_bits)) +
+            (other.data << (frac_bits - other.frac_bits)),
+            max(self.int_bits, other.int_bits) + 1, frac_bits,
+            self.signed or other.signed)
+
+    def __mul__(self, other: "FixedArray") -> "FixedArray":
+        """Full precision multiplication, like "FpBinary.__mul__"."""
+        return FixedArray(
+            self.data * other.data, self.int_bits + other.int_bits,
+            self.frac_bits + other.frac_bits, self.signed or other.signed)
+
+    def __getitem__(self, key) -> "FixedArray":
+        return FixedArray(self.data[key], *self.format, self.signed)
+
+    @property
+    def format(self) -> Tuple[int, int]:
+        """Get the format (int_bits, frac_bits), like "FpBinary.format"."""
+        return (self.int_bits, self.frac_bits)
+
+    @property
+    def total_bits(self) -> int:
+        """Get the total amount of bits of a single element."""
+        return self.int_bits + self.frac_bits
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Get the shape of the underlying integer array."""
+        return self.data.shape
+
+    @classmethod
+    def from_value(cls, array_in, int_bits: int, frac_bits: int,
+                   signed: bool = True,
+                   aggressive: bool = False) -> "FixedArray":
+        """Quantize an arbitrary array. Like "FpBinary(value=...)", the
+        values get rounded half up and saturated."""
+        values = v_power_of_two(array_in) if aggressive else array_in
+        raw = np.floor(np.asarray(values, dtype=np.float64) *
+                       2 ** frac_bits + 0.5).astype(np.int64)
+        return cls(resize_raw(raw, frac_bits, (int_bits, frac_bits), signed),
+                   int_bits, frac_bits, signed)
+
+    @classmethod
+    def from_fixedint(cls, array_in, int_bits: int, frac_bits: int,
+                      signed: bool = True) -> "FixedArray":
+        """Create an array from unsigned integers of the binary values,
+        like "FpBinary(bit_field=...)"."""
+        raw = np.asarray(array_in, dtype=np.int64)
+        if signed:
+            raw = np.where(raw >= 2 ** (int_bits + frac_bits - 1),
+                           raw - 2 ** (int_bits + frac_bits), raw)
+        return cls(raw, int_bits, frac_bits, signed)
+
+    @classmethod
+    def from_object(cls, array_in) -> "FixedArray":
+        """Create an array from an object array of fixed point numbers."""
+        sample = array_in.item(0)
+        # "operator.index" yields the unsigned bit field of "FpBinary"
+        fixedint = np.fromiter(
+            map(operator.index, array_in.flat), dtype=np.int64,
+            count=array_in.size).reshape(array_in.shape)
+        int_bits, frac_bits = sample.format
+        return cls.from_fixedint(fixedint, int_bits, frac_bits,
+                                 sample.is_signed)
+
+    @classmethod
+    def random(cls, size: tuple, bitwidth: Bitwidth,
+               signed: bool = True) -> "FixedArray":
+        """Create an array of random fixed point numbers."""
+        int_bits, frac_bits = bitwidth.as_tuple
+        return cls.from_fixedint(
+            np.random.randint(2 ** (int_bits + frac_bits), size=size,
+                              dtype=np.int64),
+            int_bits, frac_bits, signed)
+
+    def resize(self, format_: Tuple[int, int], overflow=OverflowEnum.sat,
+               rounding=RoundingEnum.near_even) -> "FixedArray":
+        """Resize all elements, like "FpBinary.resize"."""
+        raw = round_raw(self.data, self.frac_bits - format_[1], rounding)
+        return FixedArray(limit_raw(raw, format_, self.signed, overflow),
+                          *format_, self.signed)
+
+    def to_fixedint(self) -> np.ndarray:
+        """Convert to unsigned integers of the binary values.
+        Vectorized equivalent of "v_to_fixedint"."""
+        return np.bitwise_and(self.data, 2 ** self.total_bits - 1)
+
+    def to_binary_string(self) -> np.ndarray:
+        """Convert to binary strings. The bits are unpacked into a char
+        matrix, which is viewed as one bytes string per element."""
+        shifts = np.arange(self.total_bits - 1, -1, -1)
+        chars = ((self.to_fixedint()[..., None] >> shifts) & 1) + ord("0")
+        return chars.astype(np.uint8).view(f"S{self.total_bits}")[..., 0]
+
+    def to_float(self) -> np.ndarray:
+        """Convert to floating point values."""
+        return self.data / 2 ** self.frac_bits
+
+    def to_object(self):
+        """Convert to an object array of fixed point numbers."""
+        return to_fixed_point_array(
+            self.to_fixedint(), from_value=False, int_bits=self.int_bits,
+            frac_bits=self.frac_bits, signed=self.signed)
+
+
 def random_fixed_array(size: tuple, bitwidth: Bitwidth,
                        signed: bool = True):
     """Create an array of random fixed point numbers."""
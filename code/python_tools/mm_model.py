@@ -0,0 +1,129 @@
+"""Bit-true model of "mm.vhd". The intermediate bitwidths are derived from
+the generics exactly like in the VHDL design ("C_INTW_SUM1" and
+"C_INTW_SUM2"). Whole batches of kernels and windows are evaluated at once
+on integer arrays. The in- and outputs are the unsigned integers of the
+binary values (see "FixedArray.to_fixedint()"), like they are applied to
+the ports of "mm.vhd"."""
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+from fpbinary import OverflowEnum
+
+from common import InconsistencyError
+from fp_helper import FixedArray
+
+
+def log2(value: int) -> int:
+    """Binary logarithm, rounded up. Equivalent to "log2" in "math_pkg.vhd".
+
+    >>> [log2(value) for value in range(6)]
+    [0, 0, 1, 2, 2, 3]
+    """
+    return max(value - 1, 0).bit_length()
+
+
+@dataclass
+class MmModel:
+    """Represents a "mm.vhd" instance. The fields are the generics.
+
+    >>> mm = MmModel(0, 8, 4, 8, 4, 3)
+    >>> mm.int_bits_sum1, mm.int_bits_sum2, mm.output_bits
+    (10, 11, 19)
+    >>> data = np.full((2, 3, 3), 0x10)  # 1.0
+    >>> weights = np.stack((np.full((3, 3), 0x20), np.full((3, 3), 0xe0)))
+    >>> mm.evaluate(data, weights)  # 9 * 2.0 and 9 * -2.0
+    array([  4608, 519680])
+    """
+    # pylint: disable=too-many-instance-attributes
+    first_stage: int
+    data_total_bits: int
+    data_frac_bits: int
+    weights_total_bits: int
+    weights_frac_bits: int
+    ksize: int
+
+    @classmethod
+    def from_generics(cls, generics: dict) -> "MmModel":
+        """Create a model from the generics of "mm.vhd"."""
+        return cls(
+            generics["C_FIRST_STAGE"], generics["C_DATA_TOTAL_BITS"],
+            generics["C_DATA_FRAC_BITS_IN"], generics["C_WEIGHTS_TOTAL_BITS"],
+            generics["C_WEIGHTS_FRAC_BITS"], generics["C_KSIZE"])
+
+    @property
+    def data_format(self) -> Tuple[int, int]:
+        """Format of the data. At the first stage, the data is unsigned.
+        It's extended by a zero bit to obtain a signed representation."""
+        return (self.data_total_bits - self.data_frac_bits + self.first_stage,
+                self.data_frac_bits)
+
+    @property
+    def weights_format(self) -> Tuple[int, int]:
+        """Format of the weights."""
+        return (self.weights_total_bits - self.weights_frac_bits,
+                self.weights_frac_bits)
+
+    @property
+    def frac_bits(self) -> int:
+        """Fractional bits of the products and sums."""
+        return self.data_frac_bits + self.weights_frac_bits
+
+    @property
+    def int_bits_sum1(self) -> int:
+        """Integer bits of the resized products and the column sums
+        ("C_INTW_SUM1")."""
+        return (self.data_format[0] + self.weights_format[0] + 1 +
+                log2(self.ksize - 1))
+
+    @property
+    def int_bits_sum2(self) -> int:
+        """Integer bits of the full sum ("C_INTW_SUM2")."""
+        return self.int_bits_sum1 + log2(self.ksize - 1)
+
+    @property
+    def output_bits(self) -> int:
+        """Width of the output port "oslv_data"."""
+        return self.int_bits_sum2 + self.frac_bits
+
+    def evaluate_fixed(self, data, weights) -> FixedArray:
+        """Evaluate a batch of windows and kernels. Both have the shape
+        (..., ksize, ksize) and are broadcasted against each other. Like at
+        the testbench, the last axis is the first index ("i") of the 2D
+        arrays in "mm.vhd"."""
+        data = np.asarray(data)
+        weights = np.asarray(weights)
+        for name, array in (("data", data), ("weights", weights)):
+            if array.shape[-2:] != (self.ksize, self.ksize):
+                raise InconsistencyError(
+                    f"Shape of the {name} doesn't fit. {array.shape[-2:]} != "
+                    f"{(self.ksize, self.ksize)}")
+
+        fixed_data = FixedArray.from_fixedint(data, *self.data_format)
+        fixed_weights = FixedArray.from_fixedint(weights,
+                                                 *self.weights_format)
+        format_sum1 = (self.int_bits_sum1, self.frac_bits)
+        products = (fixed_data * fixed_weights).resize(
+            format_sum1, OverflowEnum.wrap)
+
+        # Each addition wraps. Since the format doesn't change, wrapping
+        # once after the whole sum is equivalent.
+        column_sum = FixedArray(
+            products.data.sum(axis=-1), *format_sum1).resize(
+                format_sum1, OverflowEnum.wrap)
+        return FixedArray(
+            column_sum.data.sum(axis=-1), *format_sum1).resize(
+                (self.int_bits_sum2, self.frac_bits), OverflowEnum.wrap)
+
+    def evaluate(self, data, weights) -> np.ndarray:
+        """Evaluate a batch of windows and kernels (see "evaluate_fixed()").
+        The unsigned integers of "oslv_data" are returned."""
+        return self.evaluate_fixed(data, weights).to_fixedint()
+
+    def random_inputs(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Create a batch of random windows and kernels for fuzzing."""
+        size = (count, self.ksize, self.ksize)
+        return (
+            np.random.randint(2 ** self.data_total_bits, size=size),
+            np.random.randint(2 ** self.weights_total_bits, size=size))
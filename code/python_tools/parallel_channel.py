@@ -0,0 +1,93 @@
+"""Select the intra kernel parallelization (C_PARALLEL_CH) of each PE. The
+goal is the highest frame rate, while the estimated resources stay inside
+a given budget."""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from common import InconsistencyError
+import performance_model
+import resource_estimate
+
+
+def get_divisors(value: int) -> List[int]:
+    """Obtain all divisors of a number in ascending order.
+
+    >>> get_divisors(12)
+    [1, 2, 3, 4, 6, 12]
+    """
+    return [div for div in range(1, value + 1) if value % div == 0]
+
+
+def fits_budget(resources: resource_estimate.Resources,
+                budget: Dict[str, int]) -> bool:
+    """Check whether the resources fit into the budget. The budget contains
+    the maximum value of some fields of "resource_estimate.Resources".
+    Missing fields are not limited.
+
+    >>> fits_budget(resource_estimate.Resources(10, 0), {"multipliers": 9})
+    False
+    """
+    return all(getattr(resources, key) <= val for key, val in budget.items())
+
+
+@dataclass
+class Selection:
+    """Selected parallelization and the predicted performance."""
+    parallel_ch: List[int]
+    cycles_per_frame: int
+    cycles_per_frame_default: int
+
+    @property
+    def speedup(self) -> float:
+        """Predicted speedup compared to no parallelization."""
+        return self.cycles_per_frame_default / self.cycles_per_frame
+
+
+def select_parallel_ch(param: dict,
+                       budget: Optional[Dict[str, int]] = None) -> Selection:
+    """Select the parallelization of each PE greedily: The parallelization
+    of the bottleneck PE is increased to the next divisor of its input
+    channel, as long as the estimated resources fit into the budget. The
+    search stops when the bottleneck can't be improved anymore. PE with a
+    single output channel have no channel repeater and aren't
+    parallelized. An error is raised, if not even the design without any
+    parallelization fits into the budget.
+
+    >>> from cnn_onnx import model_zoo, parse_param
+    >>> select_parallel_ch(parse_param.parse_param(
+    ...     model_zoo.conv_3x1_1x1_max_2x2_one_channel())).parallel_ch
+    [1, 1]
+    >>> param = parse_param.parse_param(model_zoo.conv_3x1_1x1_max_2x2())
+    >>> select_parallel_ch(param, {"multipliers": 1})  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    common.InconsistencyError: The design doesn't fit into the budget ...
+    """
+    budget = budget or {}
+    divisors = [
+        get_divisors(channel_in) if channel_out > 1 else [1]
+        for channel_in, channel_out in zip(param["channel"][:-1],
+                                           param["channel"][1:])]
+    parallel_ch = [1] * param["pe"]
+    cycles_default = performance_model.estimate(param).cycles_per_frame
+    resources_default = resource_estimate.estimate(param, parallel_ch)[1]
+    if not fits_budget(resources_default, budget):
+        raise InconsistencyError(
+            f"The design doesn't fit into the budget without "
+            f"parallelization. {resources_default} > {budget}")
+
+    while True:
+        performance = performance_model.estimate(param, parallel_ch)
+        bottleneck = performance.bottleneck
+        index = divisors[bottleneck].index(parallel_ch[bottleneck])
+        if index + 1 == len(divisors[bottleneck]):
+            break
+        candidate = parallel_ch.copy()
+        candidate[bottleneck] = divisors[bottleneck][index + 1]
+        if not fits_budget(resource_estimate.estimate(param, candidate)[1],
+                           budget):
+            break
+        parallel_ch = candidate
+    return Selection(parallel_ch, performance.cycles_per_frame,
+                     cycles_default)
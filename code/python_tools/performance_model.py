@@ -0,0 +1,300 @@
+"""Analytic performance model of the generated pipeline. It estimates the
+throughput and latency of a CNN from the parameter obtained by
+"parse_param.parse_param()", without running a simulation.
+
+Each PE receives one value (one channel of one pixel) per cycle. After each
+valid convolution window, the channel repeater in "window_ctrl" outputs
+C_CH_OUT * C_CH_IN / C_PARALLEL_CH kernels, while the input is stalled.
+The accumulation in "conv" is pipelined, so it doesn't cause additional
+stalls. ReLU, maximum pooling and the output buffer are fully streaming.
+The PE with the most cycles per image determines most of the latency.
+
+"isl_start" resets the whole pipeline and "osl_rdy" stays low after the
+finish of an image. Hence the images can't overlap in the pipeline and the
+frame rate is limited by the latency plus the restart of the pipeline."""
+
+import argparse
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from common import InconsistencyError
+from cnn_onnx import parse_param
+
+# Calibration constants. They cover the handshaking between the modules,
+# which isn't described by the analytic model. They are estimations and
+# weren't fitted to the cycles of the simulations yet. Replace them by the
+# output of "cycle_report.py --fit" and set "CALIBRATED".
+CALIBRATED = False
+# cycles, where the ready signal is deasserted around each valid window
+WINDOW_OVERHEAD = 3
+# delay of line buffer, window buffer, selector, mm, conv and output buffer
+PE_PIPELINE_DELAY = 12
+# delay of the global average pooling after the last value
+AVG_POOL_DELAY = 6
+# cycles between the finish of an image and the start of the next image,
+# i. e. the start pulse and the first ready signal, see "tb_top.vhd"
+RESTART_OVERHEAD = 3
+# maximum relative error compared to the simulation, which is accepted by
+# the check of the "top" testbench (see "cycle_report.check()")
+TOLERANCE = 0.1
+
+
+@dataclass
+class PeShape:
+    """Dimensions of a single PE, like they are used in "pe.vhd"."""
+    # pylint: disable=too-many-instance-attributes
+    height: int
+    width: int
+    channel_in: int
+    channel_out: int
+    ksize: int
+    stride: int
+    pad: int
+    pool_ksize: int
+    pool_stride: int
+
+    @property
+    def conv_height(self) -> int:
+        """Height of the convolution output."""
+        return (self.height + 2 * self.pad - self.ksize) // self.stride + 1
+
+    @property
+    def conv_width(self) -> int:
+        """Width of the convolution output."""
+        return (self.width + 2 * self.pad - self.ksize) // self.stride + 1
+
+    @property
+    def height_out(self) -> int:
+        """Height of the PE output."""
+        if not self.pool_ksize:
+            return self.conv_height
+        return (self.conv_height - self.pool_ksize) // self.pool_stride + 1
+
+    @property
+    def width_out(self) -> int:
+        """Width of the PE output."""
+        if not self.pool_ksize:
+            return self.conv_width
+        return (self.conv_width - self.pool_ksize) // self.pool_stride + 1
+
+
+def iterate_pe_shapes(param: dict) -> Iterator[PeShape]:
+    """Obtain the dimensions of each PE."""
+    height, width = param["input_height"], param["input_width"]
+    for pelem in range(param["pe"]):
+        shape = PeShape(
+            height, width, param["channel"][pelem],
+            param["channel"][pelem + 1], param["conv_kernel"][pelem],
+            param["conv_stride"][pelem], param["pad"][pelem],
+            param["pool_kernel"][pelem], param["pool_stride"][pelem])
+        yield shape
+        height, width = shape.height_out, shape.width_out
+
+
+def check_parallel_ch(shape: PeShape, parallel_ch: int) -> None:
+    """Check whether the parallelization fits to the input channel of a
+    PE."""
+    if shape.channel_in % parallel_ch:
+        raise InconsistencyError(
+            f"Parallelization doesn't fit to the input channel. "
+            f"{shape.channel_in} % {parallel_ch} != 0")
+
+
+def get_parallel_ch(param: dict,
+                    parallel_ch: Optional[List[int]] = None) -> List[int]:
+    """Obtain the parallelization of each PE. It defaults to 1 for each PE,
+    like in "vhdl_top_template()".
+
+    >>> get_parallel_ch({"pe": 3})
+    [1, 1, 1]
+    """
+    if parallel_ch is None:
+        return [1] * param["pe"]
+    if len(parallel_ch) != param["pe"]:
+        raise InconsistencyError(
+            f"Parallelization doesn't fit to the PE count. "
+            f"{len(parallel_ch)} != {param['pe']}")
+    return parallel_ch
+
+
+@dataclass
+class PePerformance:
+    """Estimated performance of a single PE in cycles."""
+    cycles_per_window: int
+    cycles_per_image: int
+    fill_latency: int
+    windows: int
+
+    @property
+    def cycles_per_pixel(self) -> float:
+        """Cycles per output pixel of the convolution."""
+        return self.cycles_per_image / self.windows
+
+
+def estimate_pe(shape: PeShape, parallel_ch: int = 1) -> PePerformance:
+    """Estimate the cycles of a single PE.
+
+    >>> perf = estimate_pe(PeShape(8, 8, 4, 8, 3, 1, 0, 2, 2), 2)
+    >>> perf.cycles_per_window, perf.cycles_per_image, perf.fill_latency
+    (19, 940, 88)
+    """
+    check_parallel_ch(shape, parallel_ch)
+
+    padded_height = shape.height + 2 * shape.pad
+    padded_width = shape.width + 2 * shape.pad
+    windows = shape.conv_height * shape.conv_width
+    input_cycles = padded_height * padded_width * shape.channel_in
+
+    # without repeater, the kernels are forwarded directly
+    repeat_cycles = (
+        shape.channel_out * shape.channel_in // parallel_ch
+        if shape.channel_out > 1 else 0)
+    cycles_per_window = repeat_cycles + WINDOW_OVERHEAD
+    # cycles until the first window is complete and calculated
+    fill_latency = (
+        ((shape.ksize - 1) * padded_width + shape.ksize) * shape.channel_in +
+        PE_PIPELINE_DELAY)
+    return PePerformance(cycles_per_window,
+                         input_cycles + windows * cycles_per_window,
+                         fill_latency, windows)
+
+
+@dataclass
+class Performance:
+    """Estimated performance of the full pipeline."""
+    pe: List[PePerformance]
+    bottleneck: int
+    cycles_per_image: int
+    latency: int
+    cycles_per_frame: int
+    fps: Optional[float] = None
+
+
+def estimate(param: dict, parallel_ch: Optional[List[int]] = None,
+             clock_frequency: Optional[float] = None) -> Performance:
+    """Estimate the throughput and latency of the pipeline. The
+    parallelization defaults to 1 for each PE (see "get_parallel_ch()").
+    If the clock frequency (in Hz) is given, the frame rate gets
+    calculated. Since the images can't overlap, it's based on the latency
+    and not on the cycles of the bottleneck PE.
+
+    >>> from cnn_onnx import model_zoo
+    >>> param = parse_param.parse_param(model_zoo.conv_3x1_1x1_max_2x2())
+    >>> perf = estimate(param, clock_frequency=100e6)
+    >>> perf.cycles_per_image, perf.latency, perf.cycles_per_frame
+    (156, 197, 200)
+    >>> round(perf.fps)
+    500000
+    """
+    pe_perf = [estimate_pe(shape, para) for shape, para in
+               zip(iterate_pe_shapes(param),
+                   get_parallel_ch(param, parallel_ch))]
+    bottleneck = max(range(len(pe_perf)),
+                     key=lambda pelem: pe_perf[pelem].cycles_per_image)
+    cycles_per_image = pe_perf[bottleneck].cycles_per_image
+    # The last PE can't finish before the bottleneck has processed the
+    # full image. Afterwards the remaining PE only add their fill latency.
+    latency = (
+        sum(perf.fill_latency for perf in pe_perf[:bottleneck]) +
+        cycles_per_image +
+        sum(perf.fill_latency for perf in pe_perf[bottleneck + 1:]) +
+        param["channel"][-1] + AVG_POOL_DELAY)
+
+    cycles_per_frame = latency + RESTART_OVERHEAD
+
+    fps = (None if clock_frequency is None else
+           clock_frequency / cycles_per_frame)
+    return Performance(pe_perf, bottleneck, cycles_per_image, latency,
+                       cycles_per_frame, fps)
+
+
+def compare(estimated: int, measured: int) -> float:
+    """Obtain the relative error of an estimation compared to the cycles
+    measured in simulation.
+
+    >>> compare(110, 100)
+    0.1
+    """
+    return (estimated - measured) / measured
+
+
+def fit_constants(samples: List[Tuple[dict, List[int], float, float]]
+                  ) -> Dict[str, int]:
+    """Fit the calibration constants to the cycles of simulations. Each
+    sample consists of the parsed model parameter, the parallelization and
+    the simulated latency and cycles from start to start (see
+    "cycle_report.summarize()"). The latency is linear in the constants.
+    The samples should cover models with different PE and window counts.
+
+    >>> from cnn_onnx import model_zoo
+    >>> samples = []
+    >>> for model in (model_zoo.conv_3x1_1x1_max_2x2,
+    ...               model_zoo.conv_3x3_2x2_1x1, model_zoo.conv_4x3x1_1x1):
+    ...     param = parse_param.parse_param(model())
+    ...     perf = estimate(param)
+    ...     windows = perf.pe[perf.bottleneck].windows
+    ...     latency = perf.latency + windows + 2 * (param["pe"] - 1)
+    ...     samples.append((param, [1] * param["pe"], latency, latency + 5))
+    >>> fit_constants(samples)  # doctest: +NORMALIZE_WHITESPACE
+    {'WINDOW_OVERHEAD': 4, 'PE_PIPELINE_DELAY': 14, 'AVG_POOL_DELAY': 6,
+     'RESTART_OVERHEAD': 5}
+    """
+    rows, targets, restarts = [], [], []
+    for param, parallel_ch, latency, start_to_start in samples:
+        performance = estimate(param, parallel_ch)
+        # The bottleneck contains the overhead of each window, the other PE
+        # contribute their pipeline delay.
+        features = [performance.pe[performance.bottleneck].windows,
+                    param["pe"] - 1, 1]
+        offset = performance.latency - int(np.dot(
+            features, [WINDOW_OVERHEAD, PE_PIPELINE_DELAY, AVG_POOL_DELAY]))
+        rows.append(features)
+        targets.append(latency - offset)
+        restarts.append(start_to_start - latency)
+
+    solution = np.linalg.lstsq(np.array(rows, dtype=float),
+                               np.array(targets, dtype=float), rcond=None)[0]
+    constants = dict(zip(
+        ("WINDOW_OVERHEAD", "PE_PIPELINE_DELAY", "AVG_POOL_DELAY"),
+        (int(round(value)) for value in solution)))
+    constants["RESTART_OVERHEAD"] = int(round(np.mean(restarts)))
+    return constants
+
+
+def report(performance: Performance) -> Dict[str, object]:
+    """Summarize the performance estimation in a dictionary. It states
+    whether the calibration constants were fitted to simulations."""
+    summary: Dict[str, object] = {
+        "calibrated": CALIBRATED,
+        "bottleneck_pe": performance.bottleneck + 1,
+        "cycles_per_image": performance.cycles_per_image,
+        "latency": performance.latency,
+        "cycles_per_frame": performance.cycles_per_frame,
+        "cycles_per_pixel": [round(perf.cycles_per_pixel, 2)
+                             for perf in performance.pe],
+    }
+    if performance.fps is not None:
+        summary["fps"] = round(performance.fps, 2)
+    return summary
+
+
+def main():
+    """Main function to estimate the performance of a model."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model", type=str, help="Path to the model.")
+    parser.add_argument("--parallel-ch", type=int, nargs="+",
+                        help="Parallelization of each PE.")
+    parser.add_argument("--clock", type=float, default=100e6,
+                        help="Clock frequency in Hz.")
+    args = parser.parse_args()
+
+    performance = estimate(parse_param.parse_param(args.model),
+                           args.parallel_ch, args.clock)
+    for key, val in report(performance).items():
+        print(f"{key}: {val}")
+
+
+if __name__ == "__main__":
+    main()
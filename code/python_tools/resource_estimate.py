@@ -0,0 +1,82 @@
+"""Estimate the FPGA resources of a CNN from the parameter obtained by
+"parse_param.parse_param()", without running a synthesis.
+
+Multipliers and BRAM bits are derived directly from the VHDL sources. LUT
+and FF counts aren't estimated, since there are no synthesis results to
+calibrate a model. They are reported by the yosys run of
+"vhdl/syn/synthesize.sh"."""
+
+import argparse
+from dataclasses import dataclass, fields
+from typing import List, Optional, Sequence, Tuple
+
+from cnn_onnx import parse_param
+from performance_model import (
+    PeShape, check_parallel_ch, get_parallel_ch, iterate_pe_shapes)
+
+
+@dataclass
+class Resources:
+    """Resources of a part of the design."""
+    multipliers: int = 0
+    bram_bits: int = 0
+
+    def __add__(self, other: "Resources") -> "Resources":
+        return Resources(*(getattr(self, field.name) +
+                           getattr(other, field.name)
+                           for field in fields(self)))
+
+
+def estimate_pe(shape: PeShape, parallel_ch: int,
+                bitwidth: Sequence[int]) -> Resources:
+    """Estimate the resources of a single PE.
+
+    >>> estimate_pe(PeShape(8, 8, 4, 8, 3, 1, 0, 2, 2), 2, (8, 4, 4, 8, 4))
+    Resources(multipliers=18, bram_bits=896)
+    """
+    check_parallel_ch(shape, parallel_ch)
+
+    total_bits = bitwidth[0]
+    # one "mm" per parallel channel
+    multipliers = shape.ksize ** 2 * parallel_ch
+    # line buffer of the convolution, see "line_buffer.vhd"
+    bram_bits = ((shape.width + 2 * shape.pad) * shape.channel_in *
+                 (shape.ksize - 1) * total_bits)
+    # line buffer of the maximum pooling
+    if shape.pool_ksize:
+        bram_bits += (shape.conv_width * shape.channel_out *
+                      (shape.pool_ksize - 1) * total_bits)
+    return Resources(multipliers, bram_bits)
+
+
+def estimate(param: dict, parallel_ch: Optional[List[int]] = None
+             ) -> Tuple[List[Resources], Resources]:
+    """Estimate the resources of each PE and in total. The parallelization
+    defaults to 1 for each PE (see "performance_model.get_parallel_ch()")."""
+    pe_resources = [
+        estimate_pe(shape, para, bitwidth) for shape, para, bitwidth in
+        zip(iterate_pe_shapes(param), get_parallel_ch(param, parallel_ch),
+            param["bitwidth"])]
+    total = Resources()
+    for resources in pe_resources:
+        total += resources
+    return pe_resources, total
+
+
+def main():
+    """Main function to estimate the resources of a model."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model", type=str, help="Path to the model.")
+    parser.add_argument("--parallel-ch", type=int, nargs="+",
+                        help="Parallelization of each PE.")
+    args = parser.parse_args()
+
+    pe_resources, total = estimate(parse_param.parse_param(args.model),
+                                   args.parallel_ch)
+    for pelem, resources in enumerate(pe_resources, 1):
+        print(f"PE {pelem}: {resources}")
+    print(f"total: {total}")
+
+
+if __name__ == "__main__":
+    main()
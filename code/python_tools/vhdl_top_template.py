@@ -3,18 +3,59 @@ Previously it was used for cocotb compatibility, too."""
 
 import argparse
 import os
+from typing import List, Optional, Tuple
 
 import onnx
 
 from cnn_onnx import convert_weights, model_zoo, parse_param
-
-
-def vhdl_top_template(param: dict, output_file: str) -> None:
-    """"Generate a VHDL toplevel wrapper with all needed CNN parameter."""
+from cnn_onnx.model_context import ModelContext
+from parallel_channel import Selection, select_parallel_ch
+import performance_model
+
+
+def format_selection(pelem: int, selection: Optional[Selection] = None
+                     ) -> Tuple[List[str], str]:
+    """Obtain the parallelization of each PE and a report of the predicted
+    performance. Without a selection, no parallelization is used."""
+    if selection is None:
+        return ["1"] * pelem, ""
+    calibrated = ("calibrated" if performance_model.CALIBRATED else
+                  "uncalibrated")
+    report = (
+        f"-- Predicted cycles per frame (latency plus restart): "
+        f"{selection.cycles_per_frame} "
+        f"(speedup: {selection.speedup:.2f}, {calibrated} model)\n")
+    return list(map(str, selection.parallel_ch)), report
+
+
+def format_packed(param: dict) -> str:
+    """Obtain the generics of the packed weights image. They are empty, if
+    the weights are stored in files per layer."""
+    if "weights_image" not in param:
+        return ""
+    return (
+        f"    C_WEIGHTS_IMAGE => \"{param['weights_image']}\",\n"
+        "    C_WEIGHTS_OFFSET => (" +
+        ", ".join(f"{i+1} => {offset[0]}"
+                  for i, offset in enumerate(param["weights_offset"])) +
+        "),\n    C_BIAS_OFFSET => (" +
+        ", ".join(f"{i+1} => {offset[1]}"
+                  for i, offset in enumerate(param["weights_offset"])) +
+        "),\n")
+
+
+def vhdl_top_template(param: dict, output_file: str,
+                      selection: Optional[Selection] = None) -> None:
+    """"Generate a VHDL toplevel wrapper with all needed CNN parameter.
+    Without a selection of the parallelization (see
+    "parallel_channel.select_parallel_ch()"), no parallelization is used.
+    If the parameter contain a packed weights image (see
+    "convert_weights.convert_weights()"), it is used instead of the files
+    per layer."""
     pelem = param["pe"]
     conv_names = param["conv_names"]
     bitwidth = param["bitwidth"]
-    parallel_channel_default = ["1"] * pelem
+    parallel_channel, report = format_selection(pelem, selection)
 
     # prepare some param strings
     bws, weight_dirs, bias_dirs = "", "", ""
@@ -28,7 +69,7 @@ def vhdl_top_template(param: dict, output_file: str) -> None:
     # write parameter into file
     with open(output_file, "w") as outfile:
         outfile.write(f"\
--- Generated file - do not modify!\n\
+-- Generated file - do not modify!\n{report}\
 library ieee;\n\
   use ieee.std_logic_1164.all;\n\
 library util;\n\
@@ -74,8 +115,9 @@ begin\n\
 {weight_dirs}      \"{param['weight_dir']}/W_{conv_names[pelem-1]}.txt\"),\n\
     C_BIAS_INIT => (\n\
 {bias_dirs}      \"{param['weight_dir']}/B_{conv_names[pelem-1]}.txt\"),\n\
+{format_packed(param)}\
     -- intra kernel parallelization\n\
-    C_PARALLEL_CH => (" + ", ".join(parallel_channel_default) + ")\n\
+    C_PARALLEL_CH => (" + ", ".join(parallel_channel) + ")\n\
   )\n\
   port map (\n\
     isl_clk     => isl_clk,\n\
@@ -101,6 +143,13 @@ def main():
                         help="Full path for storing the weights.")
     parser.add_argument("--top-name", default="top_wrapper.vhd",
                         help="Name of the toplevel module.")
+    parser.add_argument("--packed", action="store_true",
+                        help="Load the weights from a single packed image.")
+    parser.add_argument("--parallelize", action="store_true",
+                        help="Select the parallelization of each PE.")
+    for resource in ("multipliers", "bram_bits"):
+        parser.add_argument(f"--max-{resource.replace('_', '-')}", type=int,
+                            help=f"Maximum {resource} for parallelization.")
     args = parser.parse_args()
 
     if args.model_path is None:
@@ -110,9 +159,11 @@ def main():
         onnx.save(model, model_path)
     else:
         model_path = args.model_path
+    # load the model only once
+    context = ModelContext(model_path)
 
     # parse parameter
-    params = parse_param.parse_param(model_path)
+    params = parse_param.parse_param(context)
 
     # create some (redundant) dict entries
     params["weight_dir"] = args.weights_path_full
@@ -120,10 +171,27 @@ def main():
         params["weight_dir"], params["conv_names"][0]))
 
     # convert weights
-    convert_weights.convert_weights(model_path, params["weight_dir"])
+    offsets = convert_weights.convert_weights(
+        context, params["weight_dir"], packed=args.packed)
+    if args.packed:
+        params["weights_image"] = os.path.join(
+            params["weight_dir"], convert_weights.PACKED_IMAGE)
+        params["weights_offset"] = offsets
+
+    # select the parallelization
+    selection = None
+    if args.parallelize:
+        budget = {
+            resource: getattr(args, f"max_{resource}")
+            for resource in ("multipliers", "bram_bits")
+            if getattr(args, f"max_{resource}") is not None
+        }
+        selection = select_parallel_ch(params, budget)
+        print(f"Parallelization: {selection.parallel_ch}, "
+              f"predicted speedup: {selection.speedup:.2f}")
 
     # create toplevel wrapper for synthesis
-    vhdl_top_template(params, args.top_name)
+    vhdl_top_template(params, args.top_name, selection)
 
 
 if __name__ == "__main__":
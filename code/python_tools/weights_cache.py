@@ -0,0 +1,116 @@
+"""Persistent cache of quantized weights. The same initializers get
+quantized by several tools (weight conversion, inference, quantization).
+The quantized raw integer fields are stored as .npy files, which are
+addressed by the hash of the initializer data and the quantization
+settings. The least recently used entries are evicted, when the cache
+exceeds its size limit.
+
+The cache is disabled by default. It gets enabled by setting the cache
+directory in the environment variable "POCKET_CNN_CACHE", for example to
+"~/.cache/pocket-cnn/weights". The size limit (in bytes) can be set by
+"POCKET_CNN_CACHE_SIZE". Small arrays are quantized faster than they are
+loaded, so they are never cached."""
+
+import hashlib
+import os
+from typing import Optional
+
+import numpy as np
+
+from fp_helper import FixedArray
+
+DEFAULT_SIZE = 256 * 2 ** 20
+# Minimum count of elements to use the cache. Below, quantizing is faster
+# than hashing and loading. Measured crossover: about 2 ** 15 elements.
+MIN_ELEMENTS = 2 ** 15
+# Increase, when the quantization in "fp_helper" changes. It invalidates all
+# existing entries.
+VERSION = 1
+
+
+def get_cache_dir() -> Optional[str]:
+    """Obtain the cache directory. None means that the cache is disabled."""
+    cache_dir = os.environ.get("POCKET_CNN_CACHE")
+    return os.path.expanduser(cache_dir) if cache_dir else None
+
+
+def get_key(array_in, int_bits: int, frac_bits: int, signed: bool,
+            aggressive: bool) -> str:
+    """Obtain the content address of a quantized array. It includes the
+    cache version.
+
+    >>> get_key(np.zeros((2, 2), dtype=np.int8), 4, 4, True, False)[:16]
+    '4f4e64f7414f0e5b'
+    """
+    array_in = np.ascontiguousarray(array_in)
+    digest = hashlib.sha256()
+    digest.update(
+        f"{VERSION},{array_in.dtype.str}{array_in.shape}"
+        f"{int_bits},{frac_bits},{signed},{aggressive}".encode())
+    digest.update(array_in.tobytes())
+    return digest.hexdigest()
+
+
+def evict(cache_dir: str, max_size: int) -> None:
+    """Remove the least recently used entries, until the cache fits into the
+    size limit. The access time is tracked by the modification time."""
+    entries = []
+    for filename in os.listdir(cache_dir):
+        if not filename.endswith(".npy"):
+            continue
+        path = os.path.join(cache_dir, filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # evicted by another process
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    size = sum(entry[1] for entry in entries)
+    for _, entry_size, path in sorted(entries):
+        if size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        size -= entry_size
+
+
+def quantize_cached(array_in, int_bits: int, frac_bits: int,
+                    signed: bool = True, aggressive: bool = False,
+                    cache_dir: Optional[str] = None,
+                    max_size: Optional[int] = None) -> FixedArray:
+    """Quantize an array, like "FixedArray.from_value()". The result is
+    loaded memory-mapped from the cache, if it was quantized before. The
+    cache is only used, if a cache directory is given or set by the
+    environment (see "get_cache_dir()") and the array isn't too small."""
+    # pylint: disable=too-many-arguments
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    if cache_dir is None or np.size(array_in) < MIN_ELEMENTS:
+        return FixedArray.from_value(array_in, int_bits, frac_bits, signed,
+                                     aggressive)
+    if max_size is None:
+        max_size = int(os.environ.get("POCKET_CNN_CACHE_SIZE", DEFAULT_SIZE))
+
+    path = os.path.join(
+        cache_dir,
+        get_key(array_in, int_bits, frac_bits, signed, aggressive) + ".npy")
+    try:
+        os.utime(path)
+        return FixedArray(np.load(path, mmap_mode="r"), int_bits, frac_bits,
+                          signed)
+    except FileNotFoundError:
+        # not cached yet or evicted in the meantime by another process
+        pass
+
+    fixed = FixedArray.from_value(array_in, int_bits, frac_bits, signed,
+                                  aggressive)
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temporary file first, to avoid reading incomplete entries
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as outfile:
+        np.save(outfile, fixed.data)
+    os.replace(tmp_path, path)
+    evict(cache_dir, max_size)
+    return fixed
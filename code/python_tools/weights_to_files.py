@@ -1,13 +1,167 @@
 """Utility to convert weights in a format, which can be loaded
-in the VHDL design at simulation and synthesis."""
+in the VHDL design at simulation and synthesis.
+
+Each convolution layer is written in several formats:
+
+- ".txt": One line of binary strings per kernel (output and input channel).
+  This format is loaded by the VHDL design.
+- "_debug.txt": The same layout with decimal values.
+- ".mem": One hexadecimal word per line of the ".txt" file, for example for
+  "$readmemh".
+- ".bin": The raw two's complement values in row major order, little
+  endian."""
 
 import os
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from fp_helper import FixedArray, to_binary_string
+
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# Below this count of elements, the text formats are created element by
+# element. The fixed overhead of the vectorized functions is higher for small
+# arrays. Measured crossover: about 150 elements.
+SMALL_ARRAY = 128
+
+
+def get_fixed_array(array_in: Union[FixedArray, np.ndarray]) -> FixedArray:
+    """Obtain a fixed point array from an object array or a fixed point
+    array."""
+    if isinstance(array_in, FixedArray):
+        return array_in
+    return FixedArray.from_object(array_in)
+
+
+def to_binary_lines(fixed: FixedArray, per_line: int) -> bytes:
+    """Format the binary strings of an array with "per_line" elements per
+    line. The char matrix of the binary strings is extended by a newline
+    column and written at once.
+
+    >>> to_binary_lines(FixedArray(np.array([1, -1, 2, 3]), 2, 0), 2)
+    b'0111\\n1011\\n'
+    """
+    rows = fixed.data.size // per_line
+    chars = fixed.to_binary_string().reshape(rows, per_line).view(
+        np.uint8).reshape(rows, -1)
+    newline = np.full((rows, 1), ord("\n"), dtype=np.uint8)
+    return np.hstack((chars, newline)).tobytes()
+
+
+def to_hex_lines(fixed: FixedArray, per_line: int) -> bytes:
+    """Format an array as hexadecimal words with "per_line" elements per
+    word. The bits of each word are padded with zeros at the left side to
+    full digits.
+
+    >>> to_hex_lines(FixedArray(np.array([1, -1, 2, 3]), 2, 0), 2)
+    b'7\\nb\\n'
+    """
+    rows = fixed.data.size // per_line
+    bits = fixed.to_binary_string().reshape(rows, per_line).view(
+        np.uint8).reshape(rows, -1) - ord("0")
+    bits = np.pad(bits, ((0, 0), (-bits.shape[1] % 4, 0)))
+    digits = bits.reshape((rows, -1, 4)) @ np.array([8, 4, 2, 1])
+    newline = np.full((rows, 1), ord("\n"), dtype=np.uint8)
+    return np.hstack((HEX_DIGITS[digits], newline)).tobytes()
+
+
+def to_debug_lines(fixed: FixedArray, per_line: int,
+                   separator: str = " ") -> bytes:
+    """Format the decimal values of an array with "per_line" elements per
+    line. Each value is followed by the separator. Only the unique values
+    are formatted, the strings of all elements are looked up.
 
-from fp_helper import to_binary_string
+    >>> to_debug_lines(FixedArray(np.array([1, -1, 2, 3]), 2, 1), 2)
+    b'0.5 -0.5 \\n1.0 1.5 \\n'
+    """
+    unique, inverse = np.unique(fixed.data, return_inverse=True)
+    table = np.array([f"{val}{separator}" for val in
+                      (unique / 2 ** fixed.frac_bits).tolist()], dtype=object)
+    strings = table[inverse.reshape(-1, per_line)]
+    strings[:, -1] += "\n"
+    return "".join(strings.ravel().tolist()).encode()
 
 
-def weights_to_files(kernel, bias, layer_name: str, output_dir: str):
-    """Write quantized data of weights and bias to files."""
+def to_lines_elementwise(fixed: FixedArray, per_line: int,
+                         separator: str = " ") -> Tuple[bytes, bytes, bytes]:
+    """Format an array element by element like "to_binary_lines()",
+    "to_debug_lines()" and "to_hex_lines()". It's faster for small arrays.
+
+    >>> from fp_helper import Bitwidth
+    >>> fixed = FixedArray.random((4, 3), Bitwidth(8, 4, 4))
+    >>> to_lines_elementwise(fixed, 3) == (to_binary_lines(fixed, 3),
+    ...     to_debug_lines(fixed, 3), to_hex_lines(fixed, 3))
+    True
+    """
+    bits = fixed.total_bits
+    digits = -(-bits * per_line // 4)
+    fixedint = fixed.to_fixedint().ravel().tolist()
+    values = (fixed.data.ravel() / 2 ** fixed.frac_bits).tolist()
+    binary, debug, hex_ = [], [], []
+    for start in range(0, len(fixedint), per_line):
+        line = "".join(format(val, f"0{bits}b")
+                       for val in fixedint[start:start + per_line])
+        binary.append(line + "\n")
+        hex_.append(format(int(line, 2), f"0{digits}x") + "\n")
+        debug.append("".join(f"{val}{separator}" for val in
+                             values[start:start + per_line]) + "\n")
+    return ("".join(binary).encode(), "".join(debug).encode(),
+            "".join(hex_).encode())
+
+
+def to_raw_bytes(fixed: FixedArray) -> bytes:
+    """Obtain the raw two's complement values, zero extended to the
+    smallest fitting unsigned integer size.
+
+    >>> to_raw_bytes(FixedArray(np.array([1, -1]), 4, 4))
+    b'\\x01\\xff'
+    """
+    size = next(size for size in (1, 2, 4, 8)
+                if 8 * size >= fixed.total_bits)
+    return fixed.to_fixedint().astype(f"<u{size}").tobytes()
+
+
+def format_weights(kernel: Union[FixedArray, np.ndarray],
+                   bias: Union[FixedArray, np.ndarray]) -> Dict[str, bytes]:
+    """Format the weights and bias of a layer in all formats. The kernel has
+    the shape (output channel, input channel, height, width). The keys are
+    the suffixes of the filenames. The text formats are identical to
+    "format_weights_object()".
+
+    >>> from fp_helper import Bitwidth
+    >>> for shape in ((2, 1, 3, 3), (8, 4, 3, 3), (256, 1, 1, 1)):
+    ...     kernel = FixedArray.random(shape, Bitwidth(8, 4, 4))
+    ...     bias = FixedArray.random(shape[:1], Bitwidth(8, 4, 4))
+    ...     formatted = format_weights(kernel, bias)
+    ...     reference = format_weights_object(kernel.to_object(),
+    ...                                       bias.to_object())
+    ...     print(all(formatted[key] == val for key, val in reference.items()))
+    True
+    True
+    True
+    """
+    kernel = get_fixed_array(kernel)
+    bias = get_fixed_array(bias)
+    kernel_size = kernel.shape[2] * kernel.shape[3]
+    formatted: Dict[str, bytes] = {}
+    for prefix, fixed, per_line, separator in (
+            ("W", kernel, kernel_size, " "), ("B", bias, 1, "")):
+        if fixed.data.size < SMALL_ARRAY:
+            lines = to_lines_elementwise(fixed, per_line, separator)
+        else:
+            lines = (to_binary_lines(fixed, per_line),
+                     to_debug_lines(fixed, per_line, separator),
+                     to_hex_lines(fixed, per_line))
+        formatted.update(zip(
+            (f"{prefix}.txt", f"{prefix}_debug.txt", f"{prefix}.mem"), lines))
+        formatted[f"{prefix}.bin"] = to_raw_bytes(fixed)
+    return formatted
+
+
+def format_weights_object(kernel, bias) -> Dict[str, bytes]:
+    """Format the weights and bias of a layer element by element. Only the
+    text formats are supported. This is the original implementation, which
+    is used to verify "format_weights()"."""
     # pylint: disable=too-many-locals
     line_w, line_b, debug_w, debug_b = [], [], [], []
     shape = kernel.shape
@@ -26,10 +180,49 @@ def weights_to_files(kernel, bias, layer_name: str, output_dir: str):
             debug_w.append("\n")
             ch_in += 1
 
+    return {
+        "W.txt": "".join(line_w).encode(),
+        "W_debug.txt": "".join(debug_w).encode(),
+        "B.txt": "".join(line_b).encode(),
+        "B_debug.txt": "".join(debug_b).encode(),
+    }
+
+
+def weights_to_files(kernel: Union[FixedArray, np.ndarray],
+                     bias: Union[FixedArray, np.ndarray],
+                     layer_name: str, output_dir: str) -> Dict[str, bytes]:
+    """Write quantized data of weights and bias to files. Weights and bias
+    are either fixed point arrays or object arrays. The formatted data is
+    returned, for example to pack it by "pack_weights()"."""
     os.makedirs(output_dir, exist_ok=True)
-    for name, data in (("/W_" + layer_name + ".txt", line_w),
-                       ("/W_" + layer_name + "_debug.txt", debug_w),
-                       ("/B_" + layer_name + ".txt", line_b),
-                       ("/B_" + layer_name + "_debug.txt", debug_b)):
-        with open(output_dir + name, "w") as outfile:
-            outfile.write("".join(data))
+    formatted = format_weights(kernel, bias)
+    for suffix, data in formatted.items():
+        prefix, extension = suffix.split(".")
+        name = prefix[0] + "_" + layer_name + prefix[1:] + "." + extension
+        with open(os.path.join(output_dir, name), "wb") as outfile:
+            outfile.write(data)
+    return formatted
+
+
+def pack_weights(layers: List[Dict[str, bytes]]
+                 ) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Pack the hexadecimal words of all layers into a single image. The
+    weights of each layer are followed by its bias. All words are padded
+    with zeros at the left side to the widest word, so that the image can
+    be loaded at once by "load_weights_image" in "array_pkg.vhd".
+    Additionally, the offsets (in lines) of the weights and the bias of
+    each layer are returned.
+
+    >>> pack_weights([{"W.mem": b"abcd\\n1234\\n", "B.mem": b"01\\n"},
+    ...               {"W.mem": b"ef\\n", "B.mem": b"02\\n"}])
+    (b'abcd\\n1234\\n0001\\n00ef\\n0002\\n', [(0, 2), (3, 4)])
+    """
+    words: List[bytes] = []
+    offsets: List[Tuple[int, int]] = []
+    for formatted in layers:
+        bias_line = len(words) + formatted["W.mem"].count(b"\n")
+        offsets.append((len(words), bias_line))
+        words += formatted["W.mem"].splitlines()
+        words += formatted["B.mem"].splitlines()
+    width = max((len(word) for word in words), default=0)
+    return b"".join(word.rjust(width, b"0") + b"\n" for word in words), offsets
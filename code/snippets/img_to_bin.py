@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 
-"""Convert images to a binary representation."""
+"""Convert images to a binary representation. A single image or a batch of
+images (directory or glob pattern) can be converted. The images of a batch
+are converted in parallel."""
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import glob
 import os
+from typing import List, Optional
 
 import numpy as np
 import PIL.Image
 
-from fpbinary import FpBinary
-from fp_helper import to_binary_string
+from fp_helper import FixedArray
+
+# debug string of each possible pixel value: binary and decimal
+DEBUG_STRINGS = np.array([f"{val:08b} {val} " for val in range(256)],
+                         dtype=object)
 
 
 def load_image(path, width, height, mode="L"):
@@ -20,47 +29,107 @@ def load_image(path, width, height, mode="L"):
     return image
 
 
-def img_to_bin(source, dest, val_line=1):
-    """Write image to binary file."""
-    os.makedirs(dest, exist_ok=True)
+def format_image(source, val_line=1) -> dict:
+    """Format an image as binary text, debug text and raw bytes. The values
+    of each line are reversed (order needed at BRAM). Values, which don't
+    fill a complete line, are only contained in the raw bytes."""
+    pixels = FixedArray(np.asarray(source).ravel(), 8, 0, signed=False)
+    lines = pixels.data.size // val_line
+    values = pixels.to_fixedint()[:lines * val_line].reshape(
+        lines, val_line)[:, ::-1]
 
-    img_fixed, img_float, img_bin = [], [], []
-    tmp_fixed, tmp_float = [], []
-    for index, item in enumerate(np.nditer(source)):
-        # write to first position of line (order needed at BRAM)
-        item_fixed = to_binary_string(FpBinary(8, 0, signed=False, value=item))
-        tmp_fixed.insert(0, item_fixed)
-        tmp_float.insert(0, "%s %d " % (item_fixed, item))
-        img_bin.append(int(item_fixed, 2).to_bytes(1, byteorder="big"))
+    # the char matrix of the binary strings is extended by a newline column
+    chars = FixedArray(values, 8, 0, signed=False).to_binary_string().view(
+        np.uint8).reshape(lines, 8 * val_line)
+    newline = np.full((lines, 1), ord("\n"), dtype=np.uint8)
 
-        if (index+1) % val_line == 0:
-            img_fixed.extend(tmp_fixed + ["\n"])
-            tmp_fixed = []
+    debug = DEBUG_STRINGS[values]
+    debug[:, -1] += "\n"
+    return {
+        "IMAGE.txt": np.hstack((chars, newline)).tobytes(),
+        "IMAGE_DEBUG.txt": "".join(debug.ravel().tolist()).encode(),
+        "IMAGE.bin": pixels.to_fixedint().astype(np.uint8).tobytes(),
+    }
 
-            img_float.extend(tmp_float + ["\n"])
-            tmp_float = []
 
-    with open(dest + "/IMAGE.txt", "w") as outfile:
-        outfile.write("".join(img_fixed))
-    with open(dest + "/IMAGE_DEBUG.txt", "w") as outfile:
-        outfile.write("".join(img_float))
-    with open(dest + "/IMAGE.bin", "wb") as outfile:
-        outfile.write(b"".join(img_bin))
+def img_to_bin(source, dest, val_line=1) -> bytes:
+    """Write image to binary file. The raw bytes are returned."""
+    os.makedirs(dest, exist_ok=True)
+
+    formatted = format_image(source, val_line)
+    for name, data in formatted.items():
+        with open(os.path.join(dest, name), "wb") as outfile:
+            outfile.write(data)
+    return formatted["IMAGE.bin"]
+
+
+def get_paths(input_images: str) -> List[str]:
+    """Obtain the paths of all images. The input is an image, a directory
+    of images or a glob pattern. An error is raised, if there is no image.
+
+    >>> get_paths("/nonexistent/*.png")
+    Traceback (most recent call last):
+    ...
+    FileNotFoundError: No image found at /nonexistent/*.png.
+    """
+    if os.path.isdir(input_images):
+        paths = sorted(os.path.join(input_images, filename)
+                       for filename in os.listdir(input_images))
+    else:
+        paths = sorted(glob.glob(input_images))
+    if not paths:
+        raise FileNotFoundError(f"No image found at {input_images}.")
+    return paths
+
+
+def convert_image(path: str, width: int, height: int, dest: str,
+                  val_line: int, batch: bool) -> bytes:
+    """Load and convert a single image. In batch mode, each image gets its
+    own subdirectory."""
+    # pylint: disable=too-many-arguments
+    if batch:
+        dest = os.path.join(dest, os.path.splitext(os.path.basename(path))[0])
+    return img_to_bin(load_image(path, width, height), dest, val_line)
+
+
+def convert_images(paths: List[str], width: int, height: int, dest: str,
+                   val_line: int = 1, workers: Optional[int] = None,
+                   concat: Optional[str] = None) -> None:
+    """Convert all images in parallel. If "concat" is given, the raw bytes
+    of all images are concatenated in this file, for streaming many
+    frames."""
+    # pylint: disable=too-many-arguments
+    convert = partial(convert_image, width=width, height=height, dest=dest,
+                      val_line=val_line, batch=len(paths) > 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        images = executor.map(convert, paths)
+        if concat is None:
+            list(images)
+            return
+        with open(concat, "wb") as outfile:
+            for image in images:
+                outfile.write(image)
 
 
 def main():
     """Main function."""
     parser = argparse.ArgumentParser()
-    parser.add_argument("input_image", type=str)
+    parser.add_argument("input_image", type=str,
+                        help="image, directory of images or glob pattern")
     parser.add_argument("output_width", type=int)
     parser.add_argument("output_height", type=int)
     parser.add_argument("output_directory", type=str)
     parser.add_argument("val_line", type=int, help="values per line (1 or 4)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="count of worker processes")
+    parser.add_argument("--concat", type=str, default=None,
+                        help="file of the concatenated raw bytes")
     args = parser.parse_args()
 
-    img = load_image(args.input_image, args.output_height, args.output_width)
-
-    img_to_bin(img, args.output_directory, args.val_line)
+    paths = get_paths(args.input_image)
+    convert_images(paths, args.output_height, args.output_width,
+                   args.output_directory, args.val_line, args.workers,
+                   args.concat)
 
 
 if __name__ == "__main__":
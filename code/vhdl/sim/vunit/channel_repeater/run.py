@@ -4,19 +4,20 @@ import os
 from os.path import join, dirname
 from random import randint
 
+import numpy as np
+
+from stimuli import Stimuli, save_binary
+
 
 def create_stimuli(root, ksize, total_bits, channel_in, channel_out):
-    in_rand = [str(randint(0, 2 ** total_bits - 1))
-               for _ in range(ksize * ksize * channel_in)]
+    in_rand = np.random.randint(2 ** total_bits,
+                                size=ksize * ksize * channel_in)
 
     os.makedirs(join(root, "gen"), exist_ok=True)
-    with open(join(root, "gen", f"input_{ksize}_{channel_in}.csv"),
-              "w") as outfile:
-        outfile.write(", ".join(in_rand))
-
-    with open(join(root, "gen", f"output_{ksize}_{channel_in}.csv"),
-              "w") as outfile:
-        outfile.write(", ".join(in_rand * channel_out))
+    save_binary(join(root, "gen", f"input_{ksize}_{channel_in}.bin"),
+                in_rand, total_bits)
+    save_binary(join(root, "gen", f"output_{ksize}_{channel_in}.bin"),
+                np.tile(in_rand, channel_out), total_bits)
 
 
 def create_test_suite(test_lib):
@@ -29,10 +30,8 @@ def create_test_suite(test_lib):
         channel_in = randint(1, 16)
         channel_out = randint(1, 16)
 
-        # TODO: Stimuli and output files get overwritten multiple times.
-        #       Parallelization doesn't affect them.
-        # TODO: THe function shoulndn't be executed before passing to
-        #       "pre_config". I. e. use "functools.partial".
+        # Parallelization doesn't affect the stimuli. They are created only
+        # once per dimension.
         for para in (1,)*(channel_in > 1) + (channel_in,):
             generics = {"C_BITWIDTH": total_bits,
                         "C_CH": channel_in,
@@ -42,8 +41,9 @@ def create_test_suite(test_lib):
             tb_channel_repeater.add_config(
                 name=f"dim_{ksize}_ch_in_{channel_in}_para_{para}",
                 generics=generics,
-                pre_config=create_stimuli(root, ksize, total_bits,
-                                          channel_in, channel_out))
+                pre_config=Stimuli(join(root, "gen"), create_stimuli, root,
+                                   ksize, total_bits, channel_in,
+                                   channel_out))
 
         if ksize == 1:
             channel_in = 32
@@ -53,5 +53,6 @@ def create_test_suite(test_lib):
                 tb_channel_repeater.add_config(
                     name=f"dim_{ksize}_ch_in_{channel_in}_para_{para}",
                     generics=generics,
-                    pre_config=create_stimuli(root, ksize, total_bits,
-                                              channel_in, channel_out))
+                    pre_config=Stimuli(join(root, "gen"), create_stimuli,
+                                       root, ksize, total_bits, channel_in,
+                                       channel_out))
@@ -76,8 +76,8 @@ begin
     report ("Channel in: " & to_string(C_CH));
     report ("Channel out: " & to_string(C_REPEAT));
 
-    data_src := load_csv(tb_path(runner_cfg) & "gen/input_" & to_string(C_KERNEL_SIZE) & "_" & to_string(C_CH) & ".csv");
-    data_ref := load_csv(tb_path(runner_cfg) & "gen/output_" & to_string(C_KERNEL_SIZE) & "_" & to_string(C_CH) & ".csv");
+    data_src := load_binary(tb_path(runner_cfg) & "gen/input_" & to_string(C_KERNEL_SIZE) & "_" & to_string(C_CH) & ".bin", C_BITWIDTH);
+    data_ref := load_binary(tb_path(runner_cfg) & "gen/output_" & to_string(C_KERNEL_SIZE) & "_" & to_string(C_CH) & ".bin", C_BITWIDTH);
 
     check_equal(data_src.width, C_KERNEL_SIZE*C_KERNEL_SIZE*C_CH, "input_width");
     check_equal(data_src.height, 1, "input_height");
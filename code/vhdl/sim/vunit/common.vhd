@@ -1,9 +1,15 @@
 library ieee;
   use ieee.std_logic_1164.all;
 
+library vunit_lib;
+  use vunit_lib.integer_array_pkg.all;
+
 package common is
   constant C_CLK_PERIOD : time := 10 ns;
 
+  -- raw binary files, as written by "save_binary()" in "stimuli.py"
+  type t_binary_file is file of character;
+
   procedure clk_gen(signal clk : out std_logic; constant PERIOD : time);
 
   procedure report_position(cnt : in integer;
@@ -12,6 +18,14 @@ package common is
                             constant DEPTH : integer;
                             constant name : string := "";
                             constant info : string := "");
+
+  procedure read_binary(file binary_file : t_binary_file;
+                        variable value : out integer;
+                        constant BIT_WIDTH : positive := 8);
+
+  impure function load_binary(constant FILE_NAME : string;
+                              constant BIT_WIDTH : positive := 8;
+                              constant WIDTH : natural := 0) return integer_array_t;
 end package common;
 
 package body common is
@@ -53,4 +67,42 @@ package body common is
            ", d=" & to_string(d) &
            info;
   end procedure;
+
+  -- read a single unsigned value, little endian
+  procedure read_binary(file binary_file : t_binary_file;
+                        variable value : out integer;
+                        constant BIT_WIDTH : positive := 8) is
+    variable char : character;
+    variable result : integer := 0;
+  begin
+    assert BIT_WIDTH <= 31 report "binary: bitwidth is too large" severity FAILURE;
+    for i in 0 to (BIT_WIDTH+7)/8-1 loop
+      read(binary_file, char);
+      result := result + character'pos(char) * 256**i;
+    end loop;
+    value := result;
+  end procedure;
+
+  -- Load a whole binary file. Without width, the array is 1d. Else the
+  -- values are arranged in rows of the given width.
+  impure function load_binary(constant FILE_NAME : string;
+                              constant BIT_WIDTH : positive := 8;
+                              constant WIDTH : natural := 0) return integer_array_t is
+    file binary_file : t_binary_file;
+    variable arr : integer_array_t := new_1d(bit_width => BIT_WIDTH, is_signed => false);
+    variable value : integer;
+  begin
+    file_open(binary_file, FILE_NAME, read_mode);
+    while not endfile(binary_file) loop
+      read_binary(binary_file, value, BIT_WIDTH);
+      append(arr, value);
+    end loop;
+    file_close(binary_file);
+
+    if WIDTH > 0 then
+      assert length(arr) mod WIDTH = 0 report "binary: incomplete row in " & FILE_NAME severity FAILURE;
+      reshape(arr, WIDTH, length(arr) / WIDTH);
+    end if;
+    return arr;
+  end function;
 end package body common;
\ No newline at end of file
@@ -5,10 +5,9 @@ import os
 from os.path import join, dirname
 from random import randint
 
-import numpy as np
-
 from cnn_reference import conv, flatten
 from fp_helper import random_fixed_array, v_to_fixedint, Bitwidth
+from stimuli import Stimuli, save_binary
 from weights_to_files import weights_to_files
 
 
@@ -18,8 +17,8 @@ def create_stimuli(root, ksize, stride,
                    width, height):
     a_rand = random_fixed_array((1, channel_in, height, width), bitwidth_data_in)
     a_in = v_to_fixedint(a_rand)
-    np.savetxt(join(root, "gen", f"input_{ksize}_{stride}_{channel_in}.csv"),
-               flatten(a_in), delimiter=", ", fmt="%3d")
+    save_binary(join(root, "gen", f"input_{ksize}_{stride}_{channel_in}.bin"),
+                flatten(a_in), bitwidth_data_in.total_bits)
 
     a_weights_rand = random_fixed_array(
         (channel_out, channel_in, ksize, ksize), bitwidth_weights)
@@ -34,9 +33,8 @@ def create_stimuli(root, ksize, stride,
     conv_out = v_to_fixedint(conv(
         a_rand, a_weights_rand, a_bias_rand, (ksize, stride),
         bitwidth_data_out.as_tuple))
-    filename = join(root, "gen", f"output_{ksize}_{stride}_{channel_in}.csv")
-    with open(filename, "w") as outfile:
-        np.savetxt(outfile, flatten(conv_out), delimiter=", ", fmt="%3d")
+    save_binary(join(root, "gen", f"output_{ksize}_{stride}_{channel_in}.bin"),
+                flatten(conv_out), bitwidth_data_out.total_bits)
 
 
 def create_test_suite(test_lib):
@@ -89,13 +87,13 @@ def create_test_suite(test_lib):
                 "C_PARALLEL_CH": channel_para,
             }
 
-            # Only create new stimuli if the config changes. Changes in the
-            # parallelization don't affect the calculations.
-            pre_config = create_stimuli(
-                root, ksize, stride,
+            # Changes in the parallelization don't affect the calculations.
+            # The stimuli are created only once.
+            pre_config = Stimuli(
+                join(root, "gen"), create_stimuli, root, ksize, stride,
                 bitwidth_data_in, bitwidth_data_out, bitwidth_weights,
                 channel_in, channel_out,
-                width, height) if channel_para == 1 else None
+                width, height)
             tb_conv_top.add_config(
                 name=(f"stage_{stage}_dim_{ksize}_stride_{stride}" +
                       f"_ch_in_{channel_in}_para_{channel_para}"),
@@ -115,11 +113,11 @@ def create_test_suite(test_lib):
                     "C_BIAS_INIT": bias_file,
                     "C_PARALLEL_CH": channel_para,
                 })
-                pre_config = create_stimuli(
-                    root, ksize, stride,
+                pre_config = Stimuli(
+                    join(root, "gen"), create_stimuli, root, ksize, stride,
                     bitwidth_data_in, bitwidth_data_out, bitwidth_weights,
                     channel_in, channel_out,
-                    width, height) if channel_para == 2 else None
+                    width, height)
                 tb_conv_top.add_config(
                     name=(f"stage={stage}_dim_{ksize}_stride_{stride}" +
                           f"_ch_in_{channel_in}_para_{channel_para}"),
@@ -4,23 +4,21 @@ import itertools
 from os.path import join, dirname
 from random import randint
 
-import numpy as np
-
 from cnn_reference import flatten, max_pool
 from fp_helper import random_fixed_array, v_to_fixedint, Bitwidth
+from stimuli import Stimuli, save_binary
 
 
 def create_stimuli(root, ksize, stride, bitwidth, shape):
     a_rand = random_fixed_array(shape, bitwidth)
     a_in = v_to_fixedint(a_rand)
-    np.savetxt(join(root, "src", "input_%d_%d.csv" % (ksize, stride)),
-               flatten(a_in), delimiter=", ", fmt="%3d")
+    save_binary(join(root, "src", "input_%d_%d.bin" % (ksize, stride)),
+                flatten(a_in), bitwidth.total_bits)
 
     # assign the outputs
-    filename = join(root, "src", "output_%d_%d.csv" % (ksize, stride))
     max_out = v_to_fixedint(max_pool(a_rand, ksize, stride))
-    with open(filename, "w") as outfile:
-        np.savetxt(outfile, flatten(max_out), delimiter=", ", fmt="%3d")
+    save_binary(join(root, "src", "output_%d_%d.bin" % (ksize, stride)),
+                flatten(max_out), bitwidth.total_bits)
 
 
 def create_test_suite(test_lib):
@@ -49,5 +47,6 @@ def create_test_suite(test_lib):
         tb_max_top.add_config(
             name="ksize=%d_stride=%d" % (ksize, stride),
             generics=generics,
-            pre_config=create_stimuli(
+            pre_config=Stimuli(
+                join(root, "src"), create_stimuli,
                 root, ksize, stride, bitwidth, (1, channel, height, width)))
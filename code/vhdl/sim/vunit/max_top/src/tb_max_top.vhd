@@ -90,8 +90,8 @@ begin
             to_string(C_IMG_HEIGHT) & "x" &
             to_string(C_CH));
 
-    data_src := load_csv(tb_path(runner_cfg) & "input_" & to_string(C_KSIZE) & "_" & to_string(C_STRIDE) & ".csv");
-    data_ref := load_csv(tb_path(runner_cfg) & "output_" & to_string(C_KSIZE) & "_" & to_string(C_STRIDE) & ".csv");
+    data_src := load_binary(tb_path(runner_cfg) & "input_" & to_string(C_KSIZE) & "_" & to_string(C_STRIDE) & ".bin", C_TOTAL_BITS);
+    data_ref := load_binary(tb_path(runner_cfg) & "output_" & to_string(C_KSIZE) & "_" & to_string(C_STRIDE) & ".bin", C_TOTAL_BITS);
 
     check_equal(data_src.width, C_IMG_WIDTH*C_IMG_HEIGHT*C_CH, "input_width");
     check_equal(data_src.height, 1, "input_height");
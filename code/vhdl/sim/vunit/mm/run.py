@@ -2,47 +2,30 @@
 
 
 import itertools
-import math
 from os.path import join, dirname
 
-import numpy as np
+from fp_helper import Bitwidth
+from mm_model import MmModel
+from stimuli import Stimuli, save_binary
 
-from fpbinary import OverflowEnum
-from fp_helper import random_fixed_array, to_fixedint, v_to_fixedint, Bitwidth
+# count of random vectors per configuration
+VECTORS = 1000
 
 
-def create_stimuli(root, stage, ksize, bitwidth_data, bitwidth_weights):
-    # vunit import from csv can only handle datatype integer.
-    # Therefore the random fixed point values have to be converted to
-    # corresponding integer values.
-    a_rand = random_fixed_array((ksize,) * 2, bitwidth_data, signed=stage != 1)
-    # manually extend the bitwidth to implicitly create unsigned values
-    sign_bit = 1 if stage == 1 else 0
-    a_in = v_to_fixedint(a_rand)
-    name = "input_data%s.csv" % ("_stage1" if stage == 1 else str(ksize))
-    np.savetxt(join(root, "src", name), a_in, delimiter=", ", fmt="%3d")
+def create_stimuli(root, stage, generics, vectors):
+    # The fixed point values are given by the corresponding unsigned
+    # integer values. The vectors are stacked vertically.
+    model = MmModel.from_generics(generics)
+    a_in, a_weights_in = model.random_inputs(vectors)
+    a_out = model.evaluate(a_in, a_weights_in)
 
-    a_weights_rand = random_fixed_array((ksize, ksize), bitwidth_weights)
-    a_weights_in = v_to_fixedint(a_weights_rand)
-    name = "input_weights%s.csv" % ("_stage1" if stage == 1 else str(ksize))
-    np.savetxt(join(root, "src", name), a_weights_in,
-               delimiter=", ", fmt="%3d")
-
-    product = a_rand * a_weights_rand
-    additions = 0 if ksize == 1 else int(math.log2(ksize - 1) * 2)
-    # TODO: replace for loop
-    for value in product.flat:
-        # No rounding needed for resize.
-        # The range is covered by "additions + 1 + sign_bit"
-        value.resize(
-            (value.format[0] + additions + 1 + sign_bit, value.format[1]),
-            OverflowEnum.excep)
-    sum_ = np.sum(product)
-
-    # use atleast_1d to fulfill 1d requirement of savetxt
-    a_out = np.atleast_1d(to_fixedint(sum_))
-    name = "output%s.csv" % ("_stage1" if stage == 1 else str(ksize))
-    np.savetxt(join(root, "src", name), a_out, delimiter=", ", fmt="%d")
+    suffix = "_stage1" if stage == 1 else str(model.ksize)
+    save_binary(join(root, "src", f"input_data{suffix}.bin"), a_in,
+                model.data_total_bits)
+    save_binary(join(root, "src", f"input_weights{suffix}.bin"),
+                a_weights_in, model.weights_total_bits)
+    save_binary(join(root, "src", f"output{suffix}.bin"), a_out,
+                model.output_bits)
 
 
 def create_test_suite(test_lib):
@@ -66,5 +49,6 @@ def create_test_suite(test_lib):
         }
         tb_mm.add_config(
             name="stage=%d_dim=%d" % (stage, ksize), generics=generics,
-            pre_config=create_stimuli(
-                root, stage, ksize, bitwidth_data, bitwidth_weights))
+            pre_config=Stimuli(
+                join(root, "src"), create_stimuli,
+                root, stage, generics, VECTORS))
@@ -88,25 +88,25 @@ begin
             to_string(C_WEIGHTS_TOTAL_BITS) & " " &
             to_string(C_WEIGHTS_FRAC_BITS));
     if C_FIRST_STAGE = 1 then
-      data_src := load_csv(tb_path(runner_cfg) & "input_data_stage1.csv");
-      weights_src := load_csv(tb_path(runner_cfg) & "input_weights_stage1.csv");
-      data_ref := load_csv(tb_path(runner_cfg) & "output_stage1.csv");
+      data_src := load_binary(tb_path(runner_cfg) & "input_data_stage1.bin", C_DATA_TOTAL_BITS, C_KSIZE);
+      weights_src := load_binary(tb_path(runner_cfg) & "input_weights_stage1.bin", C_WEIGHTS_TOTAL_BITS, C_KSIZE);
+      data_ref := load_binary(tb_path(runner_cfg) & "output_stage1.bin", slv_data_out'length, 1);
     else
-      data_src := load_csv(tb_path(runner_cfg) & "input_data" & to_string(C_KSIZE) & ".csv");
-      weights_src := load_csv(tb_path(runner_cfg) & "input_weights" & to_string(C_KSIZE) & ".csv");
-      data_ref := load_csv(tb_path(runner_cfg) & "output" & to_string(C_KSIZE) & ".csv");
+      data_src := load_binary(tb_path(runner_cfg) & "input_data" & to_string(C_KSIZE) & ".bin", C_DATA_TOTAL_BITS, C_KSIZE);
+      weights_src := load_binary(tb_path(runner_cfg) & "input_weights" & to_string(C_KSIZE) & ".bin", C_WEIGHTS_TOTAL_BITS, C_KSIZE);
+      data_ref := load_binary(tb_path(runner_cfg) & "output" & to_string(C_KSIZE) & ".bin", slv_data_out'length, 1);
     end if;
 
+    -- the vectors are stacked vertically
     check_equal(data_src.width, C_KSIZE, "input_width");
-    check_equal(data_src.height, C_KSIZE, "input_height");
+    check_equal(data_src.height, C_KSIZE*data_ref.height, "input_height");
     check_equal(data_src.depth, 1, "input_depth");
 
     check_equal(weights_src.width, C_KSIZE, "input_width");
-    check_equal(weights_src.height, C_KSIZE, "input_height");
+    check_equal(weights_src.height, C_KSIZE*data_ref.height, "input_height");
     check_equal(weights_src.depth, 1, "input_depth");
 
     check_equal(data_ref.width, 1, "output_width");
-    check_equal(data_ref.height, 1, "output_height");
     check_equal(data_ref.depth, 1, "output_depth");
     run_test;
     test_runner_cleanup(runner);
@@ -120,19 +120,21 @@ begin
     wait until rising_edge(sl_clk) and sl_start = '1';
     stimuli_done <= false;
 
-    report ("Sending image of size " &
+    report ("Sending " & to_string(data_ref.height) & " images of size " &
             to_string(C_KSIZE) & "x" &
             to_string(C_KSIZE));
 
     wait until rising_edge(sl_clk);
-    sl_valid_in <= '1';
-    for x in 0 to C_KSIZE-1 loop
-      for y in 0 to C_KSIZE-1 loop
-        a_data_in(x, y) <= std_logic_vector(to_unsigned(get(data_src, x, y), C_DATA_TOTAL_BITS));
-        a_weights_in(x, y) <= std_logic_vector(to_unsigned(get(weights_src, x, y), C_WEIGHTS_TOTAL_BITS));
+    for n in 0 to data_ref.height-1 loop
+      sl_valid_in <= '1';
+      for x in 0 to C_KSIZE-1 loop
+        for y in 0 to C_KSIZE-1 loop
+          a_data_in(x, y) <= std_logic_vector(to_unsigned(get(data_src, x, n*C_KSIZE+y), C_DATA_TOTAL_BITS));
+          a_weights_in(x, y) <= std_logic_vector(to_unsigned(get(weights_src, x, n*C_KSIZE+y), C_WEIGHTS_TOTAL_BITS));
+        end loop;
       end loop;
+      wait until rising_edge(sl_clk);
     end loop;
-    wait until rising_edge(sl_clk);
     sl_valid_in <= '0';
 
     stimuli_done <= true;
@@ -142,11 +144,12 @@ begin
   begin
     wait until rising_edge(sl_clk) and sl_start = '1';
     data_check_done <= false;
-    wait until rising_edge(sl_clk) and sl_valid_out = '1';
-    report (to_string(slv_data_out) & " " & to_string(get(data_ref, 0, 0)));
-    report to_string(C_DATA_TOTAL_BITS+C_WEIGHTS_TOTAL_BITS+log2(C_KSIZE-1)*2);
-    check_equal(slv_data_out, std_logic_vector(to_unsigned(get(data_ref, 0, 0),
-      C_DATA_TOTAL_BITS+C_WEIGHTS_TOTAL_BITS+log2(C_KSIZE-1)*2+1+C_FIRST_STAGE)));
+    for n in 0 to data_ref.height-1 loop
+      wait until rising_edge(sl_clk) and sl_valid_out = '1';
+      check_equal(slv_data_out, std_logic_vector(to_unsigned(get(data_ref, 0, n),
+        C_DATA_TOTAL_BITS+C_WEIGHTS_TOTAL_BITS+log2(C_KSIZE-1)*2+1+C_FIRST_STAGE)),
+        "vector " & to_string(n));
+    end loop;
 
     report ("Done checking");
     data_check_done <= true;
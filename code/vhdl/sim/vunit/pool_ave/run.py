@@ -4,22 +4,20 @@
 from os.path import join, dirname
 from random import randint
 
-import numpy as np
-
 from cnn_reference import avg_pool, flatten
 
 from fp_helper import random_fixed_array, v_to_fixedint, Bitwidth
+from stimuli import Stimuli, save_binary
 
 
 def create_stimuli(root, shape, bitwidth):
     a_rand = random_fixed_array(shape, bitwidth)
     a_in = v_to_fixedint(a_rand)
-    np.savetxt(join(root, "src", "input.csv"), flatten(a_in),
-               delimiter=", ", fmt="%3d")
+    save_binary(join(root, "src", "input.bin"), flatten(a_in),
+                bitwidth.total_bits)
 
     a_out = v_to_fixedint(avg_pool(a_rand))
-    np.savetxt(join(root, "src", "output.csv"), a_out, delimiter=", ",
-               fmt="%3d")
+    save_binary(join(root, "src", "output.bin"), a_out, bitwidth.total_bits)
 
 
 def create_test_suite(test_lib):
@@ -38,5 +36,6 @@ def create_test_suite(test_lib):
     }
     tb_pool_ave.add_config(
         name="all", generics=generics,
-        pre_config=create_stimuli(root, (1, channel, height, width), bitwidth),
+        pre_config=Stimuli(join(root, "src"), create_stimuli,
+                           root, (1, channel, height, width), bitwidth),
     )
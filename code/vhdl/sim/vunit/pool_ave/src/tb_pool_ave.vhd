@@ -69,8 +69,8 @@ begin
 
   begin
     test_runner_setup(runner, runner_cfg);
-    data_src := load_csv(tb_path(runner_cfg) & "input.csv");
-    data_ref := load_csv(tb_path(runner_cfg) & "output.csv");
+    data_src := load_binary(tb_path(runner_cfg) & "input.bin", C_TOTAL_BITS);
+    data_ref := load_binary(tb_path(runner_cfg) & "output.bin", C_TOTAL_BITS);
 
     check_equal(data_src.width, C_IMG_WIDTH*C_IMG_HEIGHT*C_IMG_DEPTH, "input_width");
     check_equal(data_src.height, 1, "input_height");
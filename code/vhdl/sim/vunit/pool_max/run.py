@@ -5,18 +5,18 @@ from os.path import join, dirname
 import numpy as np
 
 from fp_helper import random_fixed_array, to_fixedint, v_to_fixedint, Bitwidth
+from stimuli import Stimuli, save_binary
 
 
 def create_stimuli(root, pool_dim, bitwidth):
     a_rand = random_fixed_array((pool_dim, pool_dim), bitwidth)
     a_in = v_to_fixedint(a_rand)
-    np.savetxt(join(root, "src", "input%d.csv" % pool_dim), a_in,
-               delimiter=", ", fmt="%3d")
+    save_binary(join(root, "src", "input%d.bin" % pool_dim), a_in,
+                bitwidth.total_bits)
 
-    # use atleast_1d to fulfill 1d requirement of savetxt
-    a_out = np.atleast_1d(to_fixedint(np.max(a_rand)))
-    np.savetxt(join(root, "src", "output%d.csv" % pool_dim), a_out,
-               delimiter=", ", fmt="%3d")
+    a_out = to_fixedint(np.max(a_rand))
+    save_binary(join(root, "src", "output%d.bin" % pool_dim), a_out,
+                bitwidth.total_bits)
 
 
 def create_test_suite(test_lib):
@@ -33,4 +33,5 @@ def create_test_suite(test_lib):
         }
         tb_pool_max.add_config(
             name="dim=%d" % (pool_dim), generics=generics,
-            pre_config=create_stimuli(root, pool_dim, bitwidth))
+            pre_config=Stimuli(join(root, "src"), create_stimuli,
+                               root, pool_dim, bitwidth))
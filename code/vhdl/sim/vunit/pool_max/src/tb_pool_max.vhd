@@ -67,8 +67,8 @@ begin
 
   begin
     test_runner_setup(runner, runner_cfg);
-    data_src := load_csv(tb_path(runner_cfg) & "input" & to_string(C_KSIZE) & ".csv");
-    data_ref := load_csv(tb_path(runner_cfg) & "output" & to_string(C_KSIZE) & ".csv");
+    data_src := load_binary(tb_path(runner_cfg) & "input" & to_string(C_KSIZE) & ".bin", C_TOTAL_BITS, C_KSIZE);
+    data_ref := load_binary(tb_path(runner_cfg) & "output" & to_string(C_KSIZE) & ".bin", C_TOTAL_BITS);
     run_test;
     test_runner_cleanup(runner);
     wait;
@@ -103,8 +103,8 @@ begin
     wait until rising_edge(sl_clk) and sl_start = '1';
     data_check_done <= false;
     wait until rising_edge(sl_clk) and sl_valid_out = '1';
-    report (to_string(slv_data_out) & " " & to_string(get(data_ref, 0, 0)));
-    check_equal(slv_data_out, std_logic_vector(to_unsigned(get(data_ref, 0, 0), C_TOTAL_BITS)));
+    report (to_string(slv_data_out) & " " & to_string(get(data_ref, 0)));
+    check_equal(slv_data_out, std_logic_vector(to_unsigned(get(data_ref, 0), C_TOTAL_BITS)));
     report ("Done checking");
     data_check_done <= true;
   end process;
@@ -2,24 +2,23 @@
 
 from os.path import join, dirname
 
-import numpy as np
-
 from cnn_reference import relu, leaky_relu
 from fpbinary import FpBinary
 from fp_helper import random_fixed_array, v_to_fixedint, Bitwidth
+from stimuli import Stimuli, save_binary
 
 
 def create_stimuli(root, bitwidth, leaky, sample_cnt: int = 1):
     a_rand = random_fixed_array((sample_cnt), bitwidth)
     a_in = v_to_fixedint(a_rand)
-    np.savetxt(join(root, "src", "input_" + "leaky" * leaky + ".csv"),
-               a_in, delimiter=", ", fmt="%3d")
+    save_binary(join(root, "src", "input_" + "leaky" * leaky + ".bin"),
+                a_in, bitwidth.total_bits)
 
     a_out = (
         relu(a_rand) if not leaky else
         leaky_relu(a_rand, FpBinary(int_bits=0, frac_bits=3, value=0.125)))
-    np.savetxt(join(root, "src", "output_" + "leaky" * leaky + ".csv"),
-               v_to_fixedint(a_out), delimiter=", ", fmt="%3d")
+    save_binary(join(root, "src", "output_" + "leaky" * leaky + ".bin"),
+                v_to_fixedint(a_out), bitwidth.total_bits)
 
 
 def create_test_suite(test_lib):
@@ -40,5 +39,6 @@ def create_test_suite(test_lib):
         tb_relu.add_config(
             name="leaky=%d_samples=%d" % (leaky, sample_cnt),
             generics=generics,
-            pre_config=create_stimuli(
+            pre_config=Stimuli(
+                join(root, "src"), create_stimuli,
                 root, bitwidth, leaky, sample_cnt=sample_cnt))
@@ -65,8 +65,8 @@ begin
 
   begin
     test_runner_setup(runner, runner_cfg);
-    data_src := load_csv(tb_path(runner_cfg) & "input" & leaky_string & ".csv");
-    data_ref := load_csv(tb_path(runner_cfg) & "output" & leaky_string & ".csv");
+    data_src := load_binary(tb_path(runner_cfg) & "input" & leaky_string & ".bin", C_TOTAL_BITS);
+    data_ref := load_binary(tb_path(runner_cfg) & "output" & leaky_string & ".bin", C_TOTAL_BITS);
     run_test;
     test_runner_cleanup(runner);
     wait;
@@ -1,15 +1,73 @@
 #!/usr/bin/env python3
 
-"""Run all unit tests, contained by the subfolders."""
+"""Run all unit tests, contained by the subfolders.
+
+The wall time of each test is stored in a ledger. In the next run, the
+tests are started longest first, so that the parallel simulation doesn't
+wait for a long test, which was started last."""
 
 from glob import glob
 import importlib.util
+import json
 import os
 import random
 import subprocess
+from typing import Dict
 
 import numpy as np
-from vunit import VUnit
+import vunit
+from vunit import VUnit, VUnitCLI
+
+LEDGER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      "sim_times.json")
+# VUnit doesn't offer a public hook to order the tests. "ScheduledVUnit"
+# relies on private methods, which are only verified with this version. It's
+# pinned in ".github/workflows/testsuite.yml".
+VUNIT_VERSION = "4.7.1"
+
+
+def load_ledger(path: str = LEDGER) -> Dict[str, float]:
+    """Load the wall times (in seconds) of the earlier runs."""
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as infile:
+        return json.load(infile)
+
+
+def update_ledger(times: Dict[str, float], path: str = LEDGER) -> None:
+    """Store the wall times of the current run. The times of tests, which
+    didn't run, are kept."""
+    ledger = load_ledger(path)
+    ledger.update(times)
+    with open(path, "w") as outfile:
+        json.dump(ledger, outfile, indent=2, sort_keys=True)
+
+
+def estimate_time(test_names, ledger: Dict[str, float]) -> float:
+    """Estimate the wall time of a test suite. Unknown tests are assumed
+    to be as long as the longest known test, so that they start early."""
+    default = max(ledger.values(), default=0.)
+    return sum(ledger.get(name, default) for name in test_names)
+
+
+class ScheduledVUnit(VUnit):
+    """VUnit project, which runs the longest tests first. The wall times
+    are taken from the ledger of the earlier runs. With another VUnit
+    version than "VUNIT_VERSION", the default order is kept."""
+    def _create_tests(self, simulator_if):
+        test_list = super()._create_tests(simulator_if)
+        # pylint: disable=protected-access
+        if (vunit.__version__ != VUNIT_VERSION or
+                not hasattr(test_list, "_test_suites")):
+            print(f"VUnit {vunit.__version__} isn't supported by the "
+                  f"scheduling. Expected {VUNIT_VERSION}.")
+            return test_list
+
+        ledger = load_ledger()
+        test_list._test_suites.sort(
+            key=lambda suite: estimate_time(suite.test_names, ledger),
+            reverse=True)
+        return test_list
 
 
 def create_test_suites(prj):
@@ -47,8 +105,46 @@ def create_test_suites(prj):
         prj.set_compile_option("enable_coverage", True)
 
 
+def report_slowest(times: Dict[str, float], count: int) -> None:
+    """Print the slowest tests of the current run."""
+    if not count or not times:
+        return
+    print(f"Slowest {min(count, len(times))} tests:")
+    for name, time in sorted(times.items(), key=lambda item: item[1],
+                             reverse=True)[:count]:
+        print(f"  {time:8.1f} s  {name}")
+
+
+def report_packed(times: Dict[str, float]) -> None:
+    """Print the wall times of the configs with a packed weights image next
+    to the configs with the files per layer. The simulation is the same, so
+    the difference is the time to load the weights at the elaboration.
+
+    >>> report_packed({"sim.tb_top.net.all": 5.0,
+    ...                "sim.tb_top.net_packed.all": 3.5})
+    Wall time with files per layer -> packed image:
+         5.0 s ->    3.5 s  sim.tb_top.net.all
+    """
+    pairs = [(name.replace("_packed", ""), name) for name in sorted(times)
+             if "_packed" in name and name.replace("_packed", "") in times]
+    if not pairs:
+        return
+    print("Wall time with files per layer -> packed image:")
+    for unpacked, packed in pairs:
+        print(f"  {times[unpacked]:6.1f} s -> {times[packed]:6.1f} s  "
+              f"{unpacked}")
+
+
 def post_run(results):
-    """Collect the coverage results and create a report."""
+    """Update the ledger and collect the coverage results and create a
+    report."""
+    times = {name: result.time
+             for name, result in results.get_report().tests.items()
+             if result.status != "skipped"}
+    update_ledger(times)
+    report_slowest(times, ARGS.slowest)
+    report_packed(times)
+
     if PRJ.simulator_supports_coverage():
         results.merge_coverage(file_name="coverage_data")
         subprocess.call(["lcov", "--capture", "--directory", "coverage_data",
@@ -59,6 +155,10 @@ if __name__ == "__main__":
     random.seed(42)
     np.random.seed(42)
     os.environ["VUNIT_SIMULATOR"] = "ghdl"
-    PRJ = VUnit.from_argv()
+    CLI = VUnitCLI()
+    CLI.parser.add_argument("--slowest", type=int, default=10,
+                            help="Count of the slowest tests to report.")
+    ARGS = CLI.parse_args()
+    PRJ = ScheduledVUnit.from_args(ARGS)
     create_test_suites(PRJ)
     PRJ.main(post_run=post_run)
@@ -0,0 +1,196 @@
+"""Lazy, parallel and cached stimuli generation for the testbenches.
+
+A "Stimuli" object wraps a "create_stimuli()" function of a run script. It
+is passed as "pre_config" to VUnit, so the stimuli are only created for the
+selected test configurations, right before they are simulated. The stimuli
+are created by a pool of worker processes. Configurations, which write into
+different directories, are created in parallel.
+
+Each stimuli gets a key, which is the hash of the function, the arguments
+(including ONNX models), the seed and the sources of the reference
+implementation in "python_tools". The created files are recorded in
+"gen/<key>.json". If all recorded files are still unchanged, the stimuli
+are not created again.
+
+The stimuli and expected outputs are written as raw binary files by
+"save_binary()". They are read by "load_binary()" in "common.vhd", which
+avoids parsing large CSV files at the simulation."""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import hashlib
+import importlib.util
+import json
+import os
+import random
+import threading
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+import common
+from common import InconsistencyError
+
+# base seed of all stimuli, the seed of each stimuli is derived from its key
+SEED = 42
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gen")
+
+# pool and locks are shared by all stimuli of a run
+EXECUTOR: Optional[ProcessPoolExecutor] = None
+LOCKS: Dict[str, threading.Lock] = {}
+LOCKS_LOCK = threading.Lock()
+
+
+def update_digest(digest, value) -> None:
+    """Add a value to the digest. ONNX models are hashed by their
+    serialization, numpy arrays by their data and everything else by its
+    representation."""
+    if hasattr(value, "net"):  # "cnn_onnx.model_context.ModelContext"
+        value = value.net
+    if hasattr(value, "SerializeToString"):
+        digest.update(value.SerializeToString())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            update_digest(digest, item)
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            update_digest(digest, (key, value[key]))
+    else:
+        digest.update(repr(value).encode())
+
+
+def save_binary(path: str, array_in, bit_width: int = 8) -> None:
+    """Write unsigned integers (for example the result of "to_fixedint()")
+    as raw little endian binary file in row major order. Each value takes
+    (bit_width + 7) // 8 bytes, like expected by "read_binary()" in
+    "common.vhd"."""
+    array_in = np.asarray(array_in, dtype=np.int64)
+    if bit_width > 31 or np.any((array_in < 0) | (array_in >= 2 ** bit_width)):
+        raise InconsistencyError(
+            f"Values don't fit into {bit_width} bit unsigned integers.")
+    raw = array_in.astype("<u4").reshape(-1, 1).view(np.uint8)
+    with open(path, "wb") as outfile:
+        outfile.write(raw[:, :(bit_width + 7) // 8].tobytes())
+
+
+def hash_file(path: str) -> str:
+    """Obtain the hash of a file."""
+    with open(path, "rb") as infile:
+        return hashlib.sha256(infile.read()).hexdigest()
+
+
+def snapshot(directory: str) -> Dict[str, tuple]:
+    """Obtain the modification time and size of all files in a directory
+    tree."""
+    files = {}
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def load_function(script: str, name: str) -> Callable:
+    """Load a function of a run script. All run scripts are named "run.py",
+    so they can't be imported by their module name."""
+    spec = importlib.util.spec_from_file_location("run", script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore
+    return getattr(module, name)
+
+
+def generate(script: str, name: str, seed: int, args: tuple,
+             kwargs: dict) -> None:
+    """Create the stimuli in a worker process. The random generators are
+    seeded, so the stimuli don't depend on the order of execution."""
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    load_function(script, name)(*args, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def get_reference_digest() -> str:
+    """Obtain the hash of all python sources of "python_tools". They contain
+    the reference implementation (for example "cnn_reference.py",
+    "fp_helper.py" and "cnn_onnx/inference.py"), so the expected outputs
+    are created again after it was changed."""
+    root = os.path.dirname(os.path.abspath(common.__file__))
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                path = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(path, root).encode())
+                digest.update(hash_file(path).encode())
+    return digest.hexdigest()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Obtain the worker pool. It is created at the first usage."""
+    global EXECUTOR  # pylint: disable=global-statement
+    if EXECUTOR is None:
+        EXECUTOR = ProcessPoolExecutor()
+    return EXECUTOR
+
+
+def get_lock(directory: str) -> threading.Lock:
+    """Obtain the lock of an output directory. Stimuli, which write into
+    the same directory, are created one after another."""
+    with LOCKS_LOCK:
+        return LOCKS.setdefault(os.path.abspath(directory), threading.Lock())
+
+
+class Stimuli:
+    """Represents the stimuli of a test configuration. The function is
+    called with the given arguments and writes all files into the output
+    directory."""
+    def __init__(self, output_dir: str, function: Callable, *args,
+                 **kwargs) -> None:
+        self.output_dir = output_dir
+        self.script = os.path.abspath(function.__code__.co_filename)
+        self.name = function.__name__
+        self.args = args
+        self.kwargs = kwargs
+
+        digest = hashlib.sha256()
+        update_digest(digest, (self.name, self.args, self.kwargs, SEED))
+        with open(self.script, "rb") as infile:
+            digest.update(infile.read())
+        digest.update(get_reference_digest().encode())
+        self.key = digest.hexdigest()
+        self.manifest = os.path.join(CACHE_DIR, self.key + ".json")
+
+    def is_cached(self) -> bool:
+        """Check whether the recorded files are still unchanged."""
+        if not os.path.isfile(self.manifest):
+            return False
+        with open(self.manifest) as infile:
+            files = json.load(infile)
+        return all(os.path.isfile(path) and hash_file(path) == file_hash
+                   for path, file_hash in files.items())
+
+    def __call__(self) -> bool:
+        """Create the stimuli, if they aren't cached. Called by VUnit
+        before the simulation."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        with get_lock(self.output_dir):
+            if self.is_cached():
+                return True
+
+            before = snapshot(self.output_dir)
+            get_executor().submit(
+                generate, self.script, self.name, int(self.key[:16], 16),
+                self.args, self.kwargs).result()
+            after = snapshot(self.output_dir)
+
+            files = {path: hash_file(path) for path, stat in after.items()
+                     if before.get(path) != stat}
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(self.manifest, "w") as outfile:
+                json.dump(files, outfile, indent=2)
+        return True
@@ -1,30 +1,35 @@
 """Run the testbench of the "top" module."""
 
-import itertools
 import os
 from os.path import join, dirname
 
-import numpy as np
 import onnx
 # import onnxruntime as rt
 
 from common import InconsistencyError
+import cycle_report
 import cnn_onnx.inference
 import cnn_onnx.model_zoo
 import cnn_onnx.parse_param
 import cnn_onnx.convert_weights
+from cnn_onnx.model_context import ModelContext
 from cnn_reference import flatten
 from fp_helper import random_fixed_array, v_to_fixedint, Bitwidth
+import performance_model
+from stimuli import Stimuli, save_binary
 import vhdl_top_template
 
+# count of images, which are sent one after another in each config
+IMAGES = int(os.environ.get("POCKET_CNN_IMAGES", 2))
 
-def create_stimuli(root, model_name):
-    model = onnx.load(join(root, model_name))
-    shape = cnn_onnx.parse_param.get_input_shape(model)
+
+def create_stimuli(root, context, total_bits, images):
+    # one different image per batch element
+    shape = [images] + cnn_onnx.parse_param.get_input_shape(context.net)[1:]
 
     a_rand = random_fixed_array(shape, Bitwidth(8, 8, 0), signed=False)
     a_in = v_to_fixedint(a_rand)
-    a_out = v_to_fixedint(cnn_onnx.inference.numpy_inference(model, a_rand))
+    a_out = v_to_fixedint(cnn_onnx.inference.numpy_inference(context, a_rand))
 
     # ONNX runtime prediction, TODO: doesn't work right now
     # https://github.com/microsoft/onnxruntime/issues/2964
@@ -33,16 +38,33 @@ def create_stimuli(root, model_name):
     # pred_onnx = sess.run(None, {input_name: in_.astype(np.float32)})[0]
     # print(pred_onnx)
 
-    np.savetxt(join(root, "input.csv"), flatten(a_in),
-               delimiter=", ", fmt="%3d")
-    np.savetxt(join(root, "output.csv"), a_out,
-               delimiter=", ", fmt="%3d")
+    # one row per image
+    save_binary(join(root, "input.bin"), flatten(a_in), total_bits)
+    save_binary(join(root, "output.bin"), a_out, total_bits)
+
+
+def add_config(tb_top, name, generics, pre_config, cycles_dir, context):
+    """Add a config, whose cycles are exported and checked against the
+    performance model."""
+    params, model_path = context
+    parallel_ch = [int(para) for para in generics["C_PARALLEL_CH"].split(",")]
+    cycles_file = join(cycles_dir, name + ".csv")
+    generics["C_CYCLES_FILE"] = cycles_file
+    # store the config, to fit the performance model by "cycle_report.py"
+    cycle_report.save_config(cycles_file, model_path, parallel_ch)
+    estimation = performance_model.estimate(params, parallel_ch)
+    tb_top.add_config(
+        name=name, generics=generics, pre_config=pre_config,
+        post_check=lambda: cycle_report.check(cycles_file, estimation))
 
 
 def create_test_suite(test_lib):
     root = dirname(__file__)
 
     tb_top = test_lib.entity("tb_top")
+    # cycle counts of each config, see "cycle_report.py"
+    cycles_dir = join(root, "cycles")
+    os.makedirs(cycles_dir, exist_ok=True)
 
     # TODO: fix the failing models
     test_cnns = (  # name in model zoo
@@ -68,18 +90,20 @@ def create_test_suite(test_lib):
         # cnn_onnx.model_zoo.conv_2x_3x1_1x1_max_2x2_padding,
         # cnn_onnx.model_zoo.conv_2x_3x1_1x1_max_2x2_mt
     )
-    for test_cnn, para_full in itertools.product(test_cnns, (0, 1)):
+    for test_cnn in test_cnns:
         test_case_name = test_cnn.__name__
         test_case_root = join(root, "src", test_case_name)
         os.makedirs(test_case_root, exist_ok=True)
 
         # save arbitrary cnn model to file in onnx format
         model = test_cnn()
-        onnx.save(model, join(test_case_root, "cnn_model.onnx"))
+        model_path = join(test_case_root, "cnn_model.onnx")
+        onnx.save(model, model_path)
+        # share the model between all tools, instead of loading it again
+        context = ModelContext(model)
 
         # parse parameter
-        params = cnn_onnx.parse_param.parse_param(
-            join(test_case_root, "cnn_model.onnx"))
+        params = cnn_onnx.parse_param.parse_param(context)
         # create some (redundant) dict entries
         params["weight_dir"] = join(test_case_root, "weights")
         params["len_weights"] = len("%s/W_%s.txt" % (
@@ -90,9 +114,8 @@ def create_test_suite(test_lib):
             params, join(test_case_root, "top_wrapper.vhd"))
 
         # convert weights
-        cnn_onnx.convert_weights.convert_weights(
-            join(test_case_root, "cnn_model.onnx"),
-            join(test_case_root, "weights"))
+        offsets = cnn_onnx.convert_weights.convert_weights(
+            context, join(test_case_root, "weights"), packed=True)
 
         # setup the test
         weights = ["%s/W_%s.txt" % (params["weight_dir"], name)
@@ -111,41 +134,59 @@ def create_test_suite(test_lib):
         bitwidth = "; ".join([", ".join(str(item) for item in inner)
                               for inner in params["bitwidth"]])
 
-        # parallelization is always corresponding to input channels
-        para_per_pe = [str(ch * para_full + 1 - para_full)
-                       for ch in params["channel"][:-1]]
-
-        generics = {
-            "C_DATA_TOTAL_BITS": params["bitwidth"][0][0],
-            "C_FOLDER": test_case_name,  # TODO: find a better way
-            "C_IMG_WIDTH_IN": params["input_width"],
-            "C_IMG_HEIGHT_IN": params["input_height"],
-            "C_PE": params["pe"],
-            "C_RELU": "".join(map(str, params["relu"])),
-            "C_LEAKY_RELU": "".join(map(str, params["leaky_relu"])),
-            "C_PAD": ", ".join(map(str, params["pad"])),
-            "C_CONV_KSIZE": ", ".join(map(str, params["conv_kernel"])),
-            "C_CONV_STRIDE": ", ".join(map(str, params["conv_stride"])),
-            "C_POOL_KSIZE": ", ".join(map(str, params["pool_kernel"])),
-            "C_POOL_STRIDE": ", ".join(map(str, params["pool_stride"])),
-            "C_CH": ", ".join(map(str, params["channel"])),
-            "C_BITWIDTH": bitwidth,
-            "C_STR_LENGTH": params["len_weights"],
-            "C_WEIGHTS_INIT": ", ".join(weights),
-            "C_BIAS_INIT": ", ".join(bias),
-            "C_PARALLEL_CH": ", ".join(para_per_pe),
-        }
-        tb_top.add_config(name=test_case_name + "_para_full" * para_full,
-                          generics=generics,
-                          pre_config=create_stimuli(
-                              join(root, "src", test_case_name),
-                              "cnn_model.onnx"))
-
-        # add an extra parallelization test for the baseline model
-        if test_case_name == "conv_3x1_1x1_max_2x2" and para_full == 0:
-            generics["C_PARALLEL_CH"] = "1, 2"
-            tb_top.add_config(
-                name=test_case_name + "_para_half",
-                generics=generics,
-                pre_config=create_stimuli(
-                    join(root, "src", test_case_name), "cnn_model.onnx"))
+        # the stimuli are shared by all configs of a model
+        pre_config = Stimuli(test_case_root, create_stimuli,
+                             test_case_root, context,
+                             params["bitwidth"][0][0], IMAGES)
+
+        for para_full in (0, 1):
+            # parallelization is always corresponding to input channels
+            para_per_pe = [str(ch * para_full + 1 - para_full)
+                           for ch in params["channel"][:-1]]
+
+            generics = {
+                "C_DATA_TOTAL_BITS": params["bitwidth"][0][0],
+                "C_FOLDER": test_case_name,  # TODO: find a better way
+                "C_IMG_WIDTH_IN": params["input_width"],
+                "C_IMG_HEIGHT_IN": params["input_height"],
+                "C_PE": params["pe"],
+                "C_RELU": "".join(map(str, params["relu"])),
+                "C_LEAKY_RELU": "".join(map(str, params["leaky_relu"])),
+                "C_PAD": ", ".join(map(str, params["pad"])),
+                "C_CONV_KSIZE": ", ".join(map(str, params["conv_kernel"])),
+                "C_CONV_STRIDE": ", ".join(map(str, params["conv_stride"])),
+                "C_POOL_KSIZE": ", ".join(map(str, params["pool_kernel"])),
+                "C_POOL_STRIDE": ", ".join(map(str, params["pool_stride"])),
+                "C_CH": ", ".join(map(str, params["channel"])),
+                "C_BITWIDTH": bitwidth,
+                "C_STR_LENGTH": params["len_weights"],
+                "C_WEIGHTS_INIT": ", ".join(weights),
+                "C_BIAS_INIT": ", ".join(bias),
+                "C_PARALLEL_CH": ", ".join(para_per_pe),
+                "C_IMAGES": IMAGES,
+            }
+            add_config(tb_top, test_case_name + "_para_full" * para_full,
+                       generics, pre_config, cycles_dir,
+                       (params, model_path))
+
+            # add an extra parallelization test for the baseline model
+            if test_case_name == "conv_3x1_1x1_max_2x2" and para_full == 0:
+                generics["C_PARALLEL_CH"] = "1, 2"
+                add_config(tb_top, test_case_name + "_para_half", generics,
+                           pre_config, cycles_dir, (params, model_path))
+
+            # Load the weights from the packed image of all layers. The
+            # outputs are checked against the same references like the
+            # files per layer. The wall times of both configs are compared
+            # by "run_all.py".
+            if para_full == 0:
+                generics["C_PARALLEL_CH"] = ", ".join(para_per_pe)
+                generics["C_WEIGHTS_IMAGE"] = join(
+                    params["weight_dir"],
+                    cnn_onnx.convert_weights.PACKED_IMAGE)
+                generics["C_WEIGHTS_OFFSET"] = ", ".join(
+                    str(offset[0]) for offset in offsets)
+                generics["C_BIAS_OFFSET"] = ", ".join(
+                    str(offset[1]) for offset in offsets)
+                add_config(tb_top, test_case_name + "_packed", generics,
+                           pre_config, cycles_dir, (params, model_path))
@@ -34,8 +34,16 @@ entity tb_top is
     C_STR_LENGTH      : integer;
     C_WEIGHTS_INIT    : string;
     C_BIAS_INIT       : string;
+    C_WEIGHTS_IMAGE   : string := "";
+    C_WEIGHTS_OFFSET  : string := "";
+    C_BIAS_OFFSET     : string := "";
 
-    C_PARALLEL_CH     : string
+    C_PARALLEL_CH     : string;
+
+    -- images, which are sent one after another
+    C_IMAGES          : integer := 1;
+    -- cycle counts of each image, not written if empty
+    C_CYCLES_FILE     : string := ""
   );
 end tb_top;
 
@@ -72,6 +80,17 @@ architecture behavioral of tb_top is
     return return_value;
   end;
 
+  -- Decode the offsets of the packed weights. Without packed weights, all offsets are zero.
+  impure function decode_offset_array(encoded_integer_vector : string) return t_int_array_1d is
+    variable return_value : t_int_array_1d(1 to C_PE) := (others => 0);
+  begin
+    if encoded_integer_vector'LENGTH > 0 then
+      return_value := decode_integer_array(encoded_integer_vector, 1);
+    end if;
+
+    return return_value;
+  end;
+
   -- Decode a string array from a string. Separators are ", ".
   impure function decode_string_array(encoded_integer_vector : string) return t_str_array_1d is
     variable parts : lines_t := split(encoded_integer_vector, ", ");
@@ -117,9 +136,13 @@ architecture behavioral of tb_top is
   shared variable data_ref : integer_array_t;
 
   signal sl_start_test : std_logic := '0';
-  signal int_input_cnt : integer := 0;
   signal sl_img_finished : std_logic := '0';
 
+  -- clock cycles since the beginning of the simulation
+  signal int_cycle : integer := 0;
+  -- cycle, when the last input value of an image was sent
+  signal a_last_input : t_int_array_1d(0 to C_IMAGES-1) := (others => 0);
+
   signal data_check_done, stimuli_done : boolean := false;
 
 begin
@@ -144,6 +167,9 @@ begin
     C_STR_LENGTH => C_STR_LENGTH,
     C_WEIGHTS_INIT => decode_string_array(C_WEIGHTS_INIT),
     C_BIAS_INIT => decode_string_array(C_BIAS_INIT),
+    C_WEIGHTS_IMAGE => C_WEIGHTS_IMAGE,
+    C_WEIGHTS_OFFSET => decode_offset_array(C_WEIGHTS_OFFSET),
+    C_BIAS_OFFSET => decode_offset_array(C_BIAS_OFFSET),
 
     C_PARALLEL_CH => decode_integer_array(C_PARALLEL_CH, 1)
   )
@@ -178,16 +204,19 @@ begin
     test_runner_setup(runner, runner_cfg);
     -- don't stop integration tests when one value is wrong
     set_stop_level(failure);
-    data_src := load_csv(tb_path(runner_cfg) & C_FOLDER & "/input.csv");
-    data_ref := load_csv(tb_path(runner_cfg) & C_FOLDER & "/output.csv");
+    -- one row per image
+    data_src := load_binary(tb_path(runner_cfg) & C_FOLDER & "/input.bin", C_DATA_TOTAL_BITS,
+                            C_IMG_WIDTH_IN * C_IMG_HEIGHT_IN * C_IMG_DEPTH_IN);
+    data_ref := load_binary(tb_path(runner_cfg) & C_FOLDER & "/output.bin", C_DATA_TOTAL_BITS,
+                            C_CH_ARRAY(C_PE));
 
     -- check whether the image dimensions between loaded data and parameter file fit
     check_equal(data_src.width, C_IMG_WIDTH_IN * C_IMG_HEIGHT_IN * C_IMG_DEPTH_IN, "input_width");
-    check_equal(data_src.height, 1, "input_height");
+    check_equal(data_src.height, C_IMAGES, "input_height");
     check_equal(data_src.depth, 1, "input_depth");
     -- last channel is equivalent to the amount of classes
     check_equal(data_ref.width, C_CH_ARRAY(C_PE), "output_width");
-    check_equal(data_ref.height, 1, "output_height");
+    check_equal(data_ref.height, C_IMAGES, "output_height");
     check_equal(data_ref.depth, 1, "output_depth");
     run_test;
     test_runner_cleanup(runner);
@@ -195,7 +224,7 @@ begin
   end process;
 
   -- stop integration tests if they are stuck
-  test_runner_watchdog(runner, 200 us);
+  test_runner_watchdog(runner, (C_IMAGES + 1) * 100 us);
 
   clk_gen(sl_clk, C_CLK_PERIOD);
 
@@ -204,7 +233,7 @@ begin
     wait until rising_edge(sl_clk) and sl_start_test = '1';
     stimuli_done <= false;
 
-    report ("Sending image of size " &
+    report ("Sending " & to_string(C_IMAGES) & " images of size " &
             to_string(C_IMG_WIDTH_IN) & "x" &
             to_string(C_IMG_HEIGHT_IN) & "x" &
             to_string(C_IMG_DEPTH_IN));
@@ -215,28 +244,29 @@ begin
     sl_valid_in <= '0';
     slv_data_in <= (others => '0');
 
-    for images in 0 to 1 loop
+    -- The next image is started as soon as the previous image is finished.
+    -- The images can't overlap, since "isl_start" resets the pipeline.
+    for img in 0 to C_IMAGES-1 loop
       wait until rising_edge(sl_clk);
       sl_start <= '1';
-      int_input_cnt <= 0;
       wait until rising_edge(sl_clk);
       sl_start <= '0';
       wait until rising_edge(sl_clk);
 
-      while sl_img_finished = '0' loop
+      for pixel in 0 to C_IMG_WIDTH_IN * C_IMG_HEIGHT_IN - 1 loop
         wait until rising_edge(sl_clk) and sl_rdy = '1';
-        if int_input_cnt < C_IMG_WIDTH_IN * C_IMG_HEIGHT_IN * C_IMG_DEPTH_IN then
-          sl_valid_in <= '1';
-          for w in 0 to C_IMG_DEPTH_IN-1 loop
-            int_input_cnt <= int_input_cnt + 1;
-            slv_data_in <= std_logic_vector(to_unsigned(get(data_src, int_input_cnt), slv_data_in'length));
-            report_position(int_input_cnt, C_IMG_HEIGHT_IN, C_IMG_WIDTH_IN, C_IMG_DEPTH_IN,
-                            "input: ", ", val=" & to_string(get(data_src, int_input_cnt)));
-            wait until rising_edge(sl_clk);
-          end loop;
-          sl_valid_in <= '0';
-        end if;
+        sl_valid_in <= '1';
+        for ch in 0 to C_IMG_DEPTH_IN-1 loop
+          slv_data_in <= std_logic_vector(to_unsigned(get(data_src, pixel*C_IMG_DEPTH_IN+ch, img), slv_data_in'length));
+          report_position(pixel*C_IMG_DEPTH_IN+ch, C_IMG_HEIGHT_IN, C_IMG_WIDTH_IN, C_IMG_DEPTH_IN,
+                          "input: ", ", val=" & to_string(get(data_src, pixel*C_IMG_DEPTH_IN+ch, img)));
+          wait until rising_edge(sl_clk);
+        end loop;
+        sl_valid_in <= '0';
       end loop;
+      a_last_input(img) <= int_cycle;
+
+      wait until rising_edge(sl_clk) and sl_img_finished = '1';
     end loop;
 
     stimuli_done <= true;
@@ -258,12 +288,12 @@ begin
     wait until rising_edge(sl_clk) and sl_start = '1';
     data_check_done <= false;
 
-    for images in 0 to 1 loop
+    for img in 0 to C_IMAGES-1 loop
       for x in 0 to data_ref.width-1 loop
         wait until rising_edge(sl_clk) and sl_valid_out = '1';
         report_position(x, data_ref.width, 1, 1,
-                        "output: ", ", val=" & to_string(get(data_ref, x)));
-        check_equal(slv_data_out, get(data_ref, x));
+                        "output: ", ", val=" & to_string(get(data_ref, x, img)));
+        check_equal(slv_data_out, get(data_ref, x, img), "image=" & to_string(img));
       end loop;
       wait until rising_edge(sl_clk) and sl_finish = '1';
     end loop;
@@ -271,4 +301,40 @@ begin
     report ("Done checking");
     data_check_done <= true;
   end process;
+
+  proc_cycle_cnt: process(sl_clk)
+  begin
+    if rising_edge(sl_clk) then
+      int_cycle <= int_cycle + 1;
+    end if;
+  end process;
+
+  -- Export the cycles of start, last input, first output and finish of each image.
+  proc_cycles: process
+    file cycles_file : text;
+    variable v_line : line;
+    variable v_start, v_first_valid : integer;
+  begin
+    if C_CYCLES_FILE'length = 0 then
+      wait;
+    end if;
+    file_open(cycles_file, C_CYCLES_FILE, write_mode);
+    write(v_line, string'("image, start, last_input, first_valid, finish"));
+    writeline(cycles_file, v_line);
+
+    for img in 0 to C_IMAGES-1 loop
+      wait until rising_edge(sl_clk) and sl_start = '1';
+      v_start := int_cycle;
+      wait until rising_edge(sl_clk) and sl_valid_out = '1';
+      v_first_valid := int_cycle;
+      wait until rising_edge(sl_clk) and sl_finish = '1';
+      write(v_line, to_string(img) & ", " & to_string(v_start) & ", " &
+                    to_string(a_last_input(img)) & ", " &
+                    to_string(v_first_valid) & ", " & to_string(int_cycle));
+      writeline(cycles_file, v_line);
+    end loop;
+
+    file_close(cycles_file);
+    wait;
+  end process;
 end behavioral;
\ No newline at end of file
@@ -3,29 +3,28 @@
 import os
 from os.path import join, dirname
 
-import numpy as np
 import onnx
 
 import cnn_onnx.inference
 import cnn_onnx.model_zoo
 import cnn_onnx.parse_param
 import cnn_onnx.convert_weights
+from cnn_onnx.model_context import ModelContext
 from cnn_reference import flatten
 from fp_helper import random_fixed_array, v_to_fixedint, Bitwidth
+from stimuli import Stimuli, save_binary
 import vhdl_top_template
 
 
-def create_stimuli(root, model_name):
-    model = onnx.load(join(root, model_name))
-    shape = cnn_onnx.parse_param.get_input_shape(model)
+def create_stimuli(root, context):
+    shape = cnn_onnx.parse_param.get_input_shape(context.net)
 
     a_rand = random_fixed_array(shape, Bitwidth(8, 8, 0), signed=False)
     a_in = v_to_fixedint(a_rand)
-    a_out = v_to_fixedint(cnn_onnx.inference.numpy_inference(model, a_rand))
+    a_out = v_to_fixedint(cnn_onnx.inference.numpy_inference(context, a_rand))
 
-    np.savetxt(join(root, "input.csv"), flatten(a_in),
-               delimiter=", ", fmt="%3d")
-    np.savetxt(join(root, "output.csv"), a_out, delimiter=", ", fmt="%3d")
+    save_binary(join(root, "input.bin"), flatten(a_in))
+    save_binary(join(root, "output.bin"), a_out)
 
 
 def create_test_suite(test_lib):
@@ -44,10 +43,11 @@ def create_test_suite(test_lib):
         # save arbitrary cnn model to file in onnx format
         model = test_cnn()
         onnx.save(model, join(test_case_root, "cnn_model.onnx"))
+        # share the model between all tools, instead of loading it again
+        context = ModelContext(model)
 
         # parse parameter
-        params = cnn_onnx.parse_param.parse_param(
-            join(test_case_root, "cnn_model.onnx"))
+        params = cnn_onnx.parse_param.parse_param(context)
         # create some (redundant) dict entries
         params["weight_dir"] = join(test_case_root, "weights")
         params["len_weights"] = len("%s/W_%s.txt" % (
@@ -64,8 +64,7 @@ def create_test_suite(test_lib):
 
         # convert weights
         cnn_onnx.convert_weights.convert_weights(
-            join(test_case_root, "cnn_model.onnx"),
-            join(test_case_root, "weights"))
+            context, join(test_case_root, "weights"))
 
         # setup the test
         generics = {
@@ -76,6 +75,6 @@ def create_test_suite(test_lib):
             "C_CLASSES": params["channel"][-1],
         }
         tb_top_wrapper.add_config(name=test_case_name, generics=generics,
-                                  pre_config=create_stimuli(
-                                      join(root, "src", test_case_name),
-                                      "cnn_model.onnx"))
+                                  pre_config=Stimuli(
+                                      test_case_root, create_stimuli,
+                                      test_case_root, context))
@@ -71,8 +71,8 @@ begin
     test_runner_setup(runner, runner_cfg);
     -- don't stop integration tests when one value is wrong
     set_stop_level(failure);
-    data_src := load_csv(tb_path(runner_cfg) & C_FOLDER & "/input.csv");
-    data_ref := load_csv(tb_path(runner_cfg) & C_FOLDER & "/output.csv");
+    data_src := load_binary(tb_path(runner_cfg) & C_FOLDER & "/input.bin", slv_data_in'length);
+    data_ref := load_binary(tb_path(runner_cfg) & C_FOLDER & "/output.bin", slv_data_out'length);
 
     -- check whether the image dimensions between loaded data and parameter file fit
     check_equal(data_src.width, C_IMG_WIDTH_IN * C_IMG_HEIGHT_IN * C_IMG_DEPTH_IN, "input_width");
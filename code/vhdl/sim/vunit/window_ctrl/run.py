@@ -7,30 +7,30 @@ from random import randint
 
 import numpy as np
 
+from cnn_reference import window_stream
+from stimuli import Stimuli, save_binary
+
+# test larger images and more channels, for example in nightly runs
+LARGE = bool(os.environ.get("POCKET_CNN_LARGE_TESTS"))
+
 
 def create_stimuli(root, ksize, stride, total_bits, channel_in,
-                   width, height):
+                   channel_out, width, height):
+    # pylint: disable=too-many-arguments
     a_rand = np.random.randint(
         2 ** total_bits, size=(1, channel_in, height, width))
+    suffix = f"{ksize}_{stride}_{channel_out}"
 
     # put the array in a stream based shape (channel > width > height)
     a_rand_stream = np.transpose(a_rand, (0, 2, 3, 1)).flatten()[None]
-    np.savetxt(join(root, "gen", f"input_{ksize}_{stride}.csv"),
-               a_rand_stream, delimiter=", ", fmt="%3d")
+    save_binary(join(root, "gen", f"input_{suffix}.bin"), a_rand_stream,
+                total_bits)
 
-    # assign the outputs
-    with open(join(root, "gen", f"output_{ksize}_{stride}.csv"),
-              "w") as outfile:
-        # - (stride - 1) to provide only outputs, where the full kernel fits
-        max_height = height - (ksize - stride) - (stride - 1)
-        max_width = width - (ksize - stride) - (stride - 1)
-        for row in range(0, max_height, stride):
-            for col in range(0, max_width, stride):
-                roi = a_rand[0, :, row:row + ksize, col:col + ksize]
-                # add None to get second dimension and comma separation
-                # ksize * ksize > channel
-                np.savetxt(outfile, roi.flatten()[None], delimiter=", ",
-                           fmt="%3d")
+    # one line per output of the channel repeater:
+    # window position > output channel, ksize * ksize > input channel
+    windows = window_stream(a_rand, ksize, stride, channel_out)
+    save_binary(join(root, "gen", f"output_{suffix}.bin"), windows,
+                total_bits)
 
 
 def create_test_suite(test_lib):
@@ -44,11 +44,12 @@ def create_test_suite(test_lib):
             continue
 
         total_bits = 8
-        channel_in = randint(1, 16)  # TODO: test larger values in nightly runs
-        width = randint(ksize, 16)
-        height = randint(ksize, 16)
+        max_size = 64 if LARGE else 16
+        channel_in = randint(1, max_size)
+        width = randint(ksize, max_size)
+        height = randint(ksize, max_size)
 
-        for channel_out in (1, randint(2, 16)):
+        for channel_out in (1, randint(2, max_size)):
             generics = {
                 "C_BITWIDTH": total_bits,
                 "C_CH_IN": channel_in,
@@ -62,6 +63,7 @@ def create_test_suite(test_lib):
             tb_window_ctrl.add_config(
                 name=f"dim={ksize}_stride={stride}_ch_out={channel_out}",
                 generics=generics,
-                pre_config=create_stimuli(
+                pre_config=Stimuli(
+                    join(root, "gen"), create_stimuli,
                     root, ksize, stride, total_bits,
-                    channel_in, width, height))
+                    channel_in, channel_out, width, height))
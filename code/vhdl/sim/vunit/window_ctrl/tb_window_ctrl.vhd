@@ -96,16 +96,19 @@ begin
             to_string(C_KERNEL_SIZE) & "x" &
             to_string(C_CH_OUT));
 
-    data_src := load_csv(tb_path(runner_cfg) & "gen/input_" & to_string(C_KERNEL_SIZE) & "_" & to_string(C_STRIDE) & ".csv");
-    data_ref := load_csv(tb_path(runner_cfg) & "gen/output_" & to_string(C_KERNEL_SIZE) & "_" & to_string(C_STRIDE) & ".csv");
+    data_src := load_binary(tb_path(runner_cfg) & "gen/input_" & to_string(C_KERNEL_SIZE) & "_" & to_string(C_STRIDE) & "_" & to_string(C_CH_OUT) & ".bin",
+                            C_BITWIDTH);
+    data_ref := load_binary(tb_path(runner_cfg) & "gen/output_" & to_string(C_KERNEL_SIZE) & "_" & to_string(C_STRIDE) & "_" & to_string(C_CH_OUT) & ".bin",
+                            C_BITWIDTH, C_KERNEL_SIZE*C_KERNEL_SIZE*C_CH_IN);
 
     check_equal(data_src.width, C_IMG_WIDTH*C_IMG_HEIGHT*C_CH_IN, "input_width");
     check_equal(data_src.height, 1, "input_height");
     check_equal(data_src.depth, 1, "input_depth");
 
-    check_equal(data_ref.width, C_KERNEL_SIZE*C_KERNEL_SIZE*C_CH_IN, "output_width"); -- channels, get repeated C_CH_OUT times
+    check_equal(data_ref.width, C_KERNEL_SIZE*C_KERNEL_SIZE*C_CH_IN, "output_width"); -- channels
     check_equal(data_ref.height, ((C_IMG_WIDTH-(C_KERNEL_SIZE-C_STRIDE))/C_STRIDE) *
-                                 ((C_IMG_HEIGHT-(C_KERNEL_SIZE-C_STRIDE))/C_STRIDE), "output_height"); -- number of positions of the kernel
+                                 ((C_IMG_HEIGHT-(C_KERNEL_SIZE-C_STRIDE))/C_STRIDE) *
+                                 C_CH_OUT, "output_height"); -- number of positions of the kernel, repeated C_CH_OUT times
     check_equal(data_ref.depth, 1, "output_depth");
 
     run_test;
@@ -143,30 +146,21 @@ begin
   end process;
 
   data_check_process : process
-    variable int_col_out, int_row_out : integer;
   begin
     wait until rising_edge(sl_clk) and sl_start = '1';
     data_check_done <= false;
     wait until rising_edge(sl_clk);
 
-    -- one row in the output file for each image position
-    int_col_out := (C_IMG_WIDTH-(C_KERNEL_SIZE-C_STRIDE))/C_STRIDE;
-    int_row_out := (C_IMG_HEIGHT-(C_KERNEL_SIZE-C_STRIDE))/C_STRIDE;
-    for pos in 0 to int_col_out*int_row_out-1 loop
-      for ch_out in 0 to C_CH_OUT-1 loop
-        -- reference data stays the same for all output channels of one image position
-        for ch_in in 0 to C_CH_IN-1 loop
-          wait until rising_edge(sl_clk) and sl_valid_out = '1';
-          for col in 0 to C_KERNEL_SIZE-1 loop
-            for row in 0 to C_KERNEL_SIZE-1 loop
-              report to_string(
-                a_data_out(0)(C_KERNEL_SIZE-1-col, C_KERNEL_SIZE-1-row)) & " " &
-                to_string(get(data_ref, ch_in*C_KERNEL_SIZE*C_KERNEL_SIZE+col+row*C_KERNEL_SIZE, pos));
-              check_equal(
-                a_data_out(0)(C_KERNEL_SIZE-1-col, C_KERNEL_SIZE-1-row),
-                get(data_ref, ch_in*C_KERNEL_SIZE*C_KERNEL_SIZE+col+row*C_KERNEL_SIZE, pos),
-                "pos=" & to_string(pos) & ", ch_in=" & to_string(ch_in) & ", ch_out=" & to_string(ch_out));
-            end loop;
+    -- one row in the output file for each image position and output channel
+    for ref_row in 0 to data_ref.height-1 loop
+      for ch_in in 0 to C_CH_IN-1 loop
+        wait until rising_edge(sl_clk) and sl_valid_out = '1';
+        for col in 0 to C_KERNEL_SIZE-1 loop
+          for row in 0 to C_KERNEL_SIZE-1 loop
+            check_equal(
+              a_data_out(0)(C_KERNEL_SIZE-1-col, C_KERNEL_SIZE-1-row),
+              get(data_ref, ch_in*C_KERNEL_SIZE*C_KERNEL_SIZE+col+row*C_KERNEL_SIZE, ref_row),
+              "pos=" & to_string(ref_row/C_CH_OUT) & ", ch_in=" & to_string(ch_in) & ", ch_out=" & to_string(ref_row mod C_CH_OUT));
           end loop;
         end loop;
       end loop;
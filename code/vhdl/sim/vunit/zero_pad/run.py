@@ -3,10 +3,9 @@
 from os.path import join, dirname
 from random import randint
 
-import numpy as np
-
 from cnn_reference import flatten, zero_pad
 from fp_helper import random_fixed_array, v_to_fixedint, Bitwidth
+from stimuli import Stimuli, save_binary
 
 
 def create_arrays(root, shape):
@@ -14,11 +13,9 @@ def create_arrays(root, shape):
 
     a_rand = random_fixed_array(shape, Bitwidth(int_bits=8, frac_bits=0))
     a_in = v_to_fixedint(a_rand)
-    np.savetxt(join(root, "src", "input_%s.csv" % id_),
-               flatten(a_in), delimiter=", ", fmt="%3d")
+    save_binary(join(root, "src", "input_%s.bin" % id_), flatten(a_in))
     a_out = v_to_fixedint(zero_pad(a_rand))
-    np.savetxt(join(root, "src", "output_%s.csv" % id_),
-               flatten(a_out), delimiter=", ", fmt="%3d")
+    save_binary(join(root, "src", "output_%s.bin" % id_), flatten(a_out))
 
 
 def create_test_suite(test_lib):
@@ -38,4 +35,5 @@ def create_test_suite(test_lib):
                 "C_IMG_HEIGHT": height,
                 "C_IMG_DEPTH": channel,
             },
-            pre_config=create_arrays(root, (1, channel, height, width)))
+            pre_config=Stimuli(join(root, "src"), create_arrays,
+                               root, (1, channel, height, width)))
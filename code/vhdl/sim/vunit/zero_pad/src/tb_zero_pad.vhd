@@ -74,8 +74,8 @@ begin
 
   begin
     test_runner_setup(runner, runner_cfg);
-    data_src := load_csv(tb_path(runner_cfg) & "input_" & id & ".csv");
-    data_ref := load_csv(tb_path(runner_cfg) & "output_" & id & ".csv");
+    data_src := load_binary(tb_path(runner_cfg) & "input_" & id & ".bin", C_DATA_WIDTH);
+    data_ref := load_binary(tb_path(runner_cfg) & "output_" & id & ".bin", C_DATA_WIDTH);
     check_equal(data_src.width, C_IMG_WIDTH * C_IMG_HEIGHT * C_IMG_DEPTH, "input_width");
     check_equal(data_src.height, 1, "input_height");
     check_equal(data_src.depth, 1, "input_depth");
@@ -22,8 +22,10 @@ entity conv is
     C_CH_IN  : integer range 1 to 512 := 4;
     C_CH_OUT : integer range 1 to 512 := 8;
 
-    C_KSIZE     : integer range 1 to 5 := 3;
-    C_BIAS_INIT : string               := "";
+    C_KSIZE       : integer range 1 to 5 := 3;
+    C_BIAS_INIT   : string               := "";
+    C_WEIGHTS_RAM : t_ram                := C_EMPTY_RAM;
+    C_BIAS_OFFSET : natural              := 0;
 
     C_PARALLEL_CH : integer range 1 to 512 := 1
   );
@@ -62,7 +64,7 @@ architecture behavioral of conv is
   signal int_mm_out_cnt : integer range 0 to C_CH_IN * C_CH_OUT - 1 := 0;
 
   -- bias
-  constant C_BIAS         : t_kernel_array := init_weights(C_BIAS_INIT, C_CH_OUT, 1, 8);
+  constant C_BIAS         : t_kernel_array := load_weights(C_BIAS_INIT, C_WEIGHTS_RAM, C_BIAS_OFFSET, C_CH_OUT, 1, 8);
   signal   int_addr_cnt_b : integer range 0 to C_BIAS'HIGH := 0;
   signal   slv_bias       : std_logic_vector(C_WEIGHTS_TOTAL_BITS - 1 downto 0);
 
@@ -29,6 +29,12 @@ entity conv_top is
     C_WEIGHTS_INIT : string               := "";
     C_BIAS_INIT    : string               := "";
 
+    -- packed weights of all layers, overrides C_WEIGHTS_INIT and C_BIAS_INIT
+    -- offsets are in words of the image
+    C_WEIGHTS_RAM    : t_ram   := C_EMPTY_RAM;
+    C_WEIGHTS_OFFSET : natural := 0;
+    C_BIAS_OFFSET    : natural := 0;
+
     C_PARALLEL_CH : integer range 1 to 512 := 1
   );
   port (
@@ -50,7 +56,7 @@ architecture behavioral of conv_top is
   signal sl_win_valid_out : std_logic := '0';
 
   -- weights
-  constant C_WEIGHTS    : t_kernel_array := init_weights(C_WEIGHTS_INIT, C_CH_IN * C_CH_OUT, C_KSIZE, 8);
+  constant C_WEIGHTS    : t_kernel_array := load_weights(C_WEIGHTS_INIT, C_WEIGHTS_RAM, C_WEIGHTS_OFFSET, C_CH_IN * C_CH_OUT, C_KSIZE, 8);
   signal   int_addr_cnt : integer range 0 to C_CH_IN * C_CH_OUT := 0;
   signal   a_weights    : t_kernel_array(0 to C_PARALLEL_CH - 1)(0 to C_KSIZE - 1, 0 to C_KSIZE - 1) := (others => (others => (others => (others => '0'))));
 
@@ -95,6 +101,8 @@ begin
       C_CH_IN               => C_CH_IN,
       C_CH_OUT              => C_CH_OUT,
       C_BIAS_INIT           => C_BIAS_INIT,
+      C_WEIGHTS_RAM         => C_WEIGHTS_RAM,
+      C_BIAS_OFFSET         => C_BIAS_OFFSET,
 
       C_PARALLEL_CH         => C_PARALLEL_CH
     )
@@ -5,6 +5,7 @@ library ieee;
   use ieee.fixed_pkg.all;
 
 library util;
+  use util.array_pkg.all;
   use util.math_pkg.all;
 
 entity pe is
@@ -32,6 +33,12 @@ entity pe is
     C_WEIGHTS_INIT : string               := "";
     C_BIAS_INIT    : string               := "";
 
+    -- packed weights of all layers, overrides C_WEIGHTS_INIT and C_BIAS_INIT
+    -- offsets are in words of the image
+    C_WEIGHTS_RAM    : t_ram   := C_EMPTY_RAM;
+    C_WEIGHTS_OFFSET : natural := 0;
+    C_BIAS_OFFSET    : natural := 0;
+
     C_PARALLEL_CH : integer range 1 to 512 := 1
   );
   port (
@@ -151,6 +158,9 @@ begin
       C_IMG_HEIGHT          => C_IMG_HEIGHT + 2 * C_PAD,
       C_WEIGHTS_INIT        => C_WEIGHTS_INIT,
       C_BIAS_INIT           => C_BIAS_INIT,
+      C_WEIGHTS_RAM         => C_WEIGHTS_RAM,
+      C_WEIGHTS_OFFSET      => C_WEIGHTS_OFFSET,
+      C_BIAS_OFFSET         => C_BIAS_OFFSET,
 
       C_PARALLEL_CH         => C_PARALLEL_CH
     )
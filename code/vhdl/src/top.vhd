@@ -38,6 +38,12 @@ entity top is
     C_WEIGHTS_INIT : t_str_array_1d(1 to C_PE)(1 to C_STR_LENGTH);
     C_BIAS_INIT    : t_str_array_1d(1 to C_PE)(1 to C_STR_LENGTH);
 
+    -- packed weights of all layers, overrides C_WEIGHTS_INIT and C_BIAS_INIT
+    -- offsets are in lines of the image
+    C_WEIGHTS_IMAGE  : string                    := "";
+    C_WEIGHTS_OFFSET : t_int_array_1d(1 to C_PE) := (others => 0);
+    C_BIAS_OFFSET    : t_int_array_1d(1 to C_PE) := (others => 0);
+
     -- intra kernel parallelization
     C_PARALLEL_CH : t_int_array_1d(1 to C_PE) := (others => 1)
   );
@@ -90,6 +96,38 @@ architecture behavioral of top is
   constant C_IMG_WIDTH  : t_img_size_array := f_calc_size(C_IMG_WIDTH_IN);
   constant C_IMG_HEIGHT : t_img_size_array := f_calc_size(C_IMG_HEIGHT_IN);
 
+  -- lines of the packed weights image, see "pack_weights()" in "weights_to_files.py"
+  -- each layer contains one line per kernel and one line per bias
+
+  function f_calc_image_lines return integer is
+    variable v_lines : integer;
+  begin
+    v_lines := 0;
+    for i in 1 to C_PE loop
+      v_lines := v_lines + C_CH(i - 1) * C_CH(i) + C_CH(i);
+    end loop;
+    return v_lines;
+  end f_calc_image_lines;
+
+  -- the words of the packed weights image are padded to the largest kernel
+
+  function f_calc_image_width return integer is
+    variable v_ksize : integer;
+  begin
+    v_ksize := 1;
+    for i in 1 to C_PE loop
+
+      if (C_CONV_KSIZE(i) > v_ksize) then
+        v_ksize := C_CONV_KSIZE(i);
+      end if;
+
+    end loop;
+    return 8 * v_ksize * v_ksize;
+  end f_calc_image_width;
+
+  -- The packed weights image is loaded only once. Each PE selects its words by the offsets.
+  constant C_WEIGHTS_RAM : t_ram := load_weights_image(C_WEIGHTS_IMAGE, f_calc_image_lines, f_calc_image_width);
+
   signal sl_output_valid : std_logic_vector(0 to C_PE + 1) := (others => '0');
 
   type t_data_array is array (0 to C_PE + 1) of std_logic_vector(C_DATA_TOTAL_BITS - 1 downto 0);
@@ -146,6 +184,9 @@ begin
         C_LEAKY              => C_LEAKY_RELU(i),
         C_WEIGHTS_INIT       => C_WEIGHTS_INIT(i),
         C_BIAS_INIT          => C_BIAS_INIT(i),
+        C_WEIGHTS_RAM        => C_WEIGHTS_RAM,
+        C_WEIGHTS_OFFSET     => C_WEIGHTS_OFFSET(i),
+        C_BIAS_OFFSET        => C_BIAS_OFFSET(i),
 
         C_PARALLEL_CH        => C_PARALLEL_CH(i)
       )
@@ -28,6 +28,9 @@ package array_pkg is
 
   type t_kernel_array is array (natural range <>) of t_slv_array_2d;
 
+  -- no packed weights image, see "load_weights_image"
+  constant C_EMPTY_RAM : t_ram(0 to - 1)(0 downto 0) := (others => (others => '0'));
+
   function array_to_slv (array_in : t_kernel_array) return std_logic_vector;
 
   function slv_to_array (slv_in : std_logic_vector; channel : integer; kernel_size : integer) return t_kernel_array;
@@ -37,12 +40,37 @@ package array_pkg is
     constant C_SIZE : in integer;
     constant C_WIDTH : in integer) return t_ram;
 
+  function ram_to_kernels (
+    constant C_RAM : in t_ram;
+    constant C_OFFSET : in integer;
+    constant C_SIZE : in integer;
+    constant C_KSIZE : in integer;
+    constant C_BITS : in integer) return t_kernel_array;
+
   impure function init_weights(
     constant C_NAME : in string;
     constant C_SIZE : in integer;
     constant C_KSIZE : in integer;
     constant C_BITS : in integer) return t_kernel_array;
 
+  impure function load_content_hex(
+    constant C_NAME : in string;
+    constant C_SIZE : in integer;
+    constant C_WIDTH : in integer) return t_ram;
+
+  impure function load_weights_image(
+    constant C_NAME : in string;
+    constant C_SIZE : in integer;
+    constant C_WIDTH : in integer) return t_ram;
+
+  impure function load_weights(
+    constant C_NAME : in string;
+    constant C_RAM : in t_ram;
+    constant C_OFFSET : in integer;
+    constant C_SIZE : in integer;
+    constant C_KSIZE : in integer;
+    constant C_BITS : in integer) return t_kernel_array;
+
 end package array_pkg;
 
 package body array_pkg is
@@ -108,38 +136,98 @@ package body array_pkg is
     return a_ram;
   end function;
 
-  -- check whether the filename is valid
-  -- TODO: Why the two functions have to be separated?
-  --       Merging them results in a failure without error message.
+  -- convert the words of a ram to kernels, starting at word C_OFFSET
+  -- each word contains one kernel, the lowest bits contain the first value
 
-  impure function init_weights(
-    constant C_NAME : in string;
+  function ram_to_kernels (
+    constant C_RAM : in t_ram;
+    constant C_OFFSET : in integer;
     constant C_SIZE : in integer;
     constant C_KSIZE : in integer;
     constant C_BITS : in integer) return t_kernel_array is
-    constant C_WIDTH       : integer := C_BITS * C_KSIZE * C_KSIZE;
-    variable a_ram         : t_ram(0 to C_SIZE - 1)(C_WIDTH - 1 downto 0);
     variable a_ram_weights : t_kernel_array(0 to C_SIZE - 1)(0 to C_KSIZE - 1, 0 to C_KSIZE - 1);
     variable v_high_index  : integer;
     variable v_low_index   : integer;
   begin
-
-    assert C_NAME'LENGTH > 0;
-
-    a_ram := load_content(C_NAME, C_SIZE, C_WIDTH);
-
-    -- convert the loaded data to proper kernels
     for kernel in 0 to C_SIZE - 1 loop
       for i in 0 to C_KSIZE - 1 loop
         for j in 0 to C_KSIZE - 1 loop
           v_high_index                := ((i + j * C_KSIZE) + 1) * C_BITS - 1;
           v_low_index                 := (i + j * C_KSIZE) * C_BITS;
-          a_ram_weights(kernel)(i, j) := a_ram(kernel)(v_high_index downto v_low_index);
+          a_ram_weights(kernel)(i, j) := C_RAM(C_OFFSET + kernel)(v_high_index downto v_low_index);
         end loop;
       end loop;
     end loop;
-
     return a_ram_weights;
   end function;
 
+  -- check whether the filename is valid
+  -- TODO: Why the two functions have to be separated?
+  --       Merging them results in a failure without error message.
+
+  impure function init_weights(
+    constant C_NAME : in string;
+    constant C_SIZE : in integer;
+    constant C_KSIZE : in integer;
+    constant C_BITS : in integer) return t_kernel_array is
+    constant C_WIDTH : integer := C_BITS * C_KSIZE * C_KSIZE;
+  begin
+
+    assert C_NAME'LENGTH > 0;
+
+    return ram_to_kernels(load_content(C_NAME, C_SIZE, C_WIDTH), 0, C_SIZE, C_KSIZE, C_BITS);
+  end function;
+
+  -- load a packed hex image, which contains the weights of all layers
+  -- one word per line, all words are padded to the same width
+
+  impure function load_content_hex(
+    constant C_NAME : in string;
+    constant C_SIZE : in integer;
+    constant C_WIDTH : in integer) return t_ram is
+    file     ram_file      : text open read_mode is C_NAME;
+    variable ram_file_line : line;
+    variable a_ram         : t_ram(0 to C_SIZE - 1)(C_WIDTH - 1 downto 0);
+  begin
+    for i in 0 to C_SIZE - 1 loop
+      readline(ram_file, ram_file_line);
+      hread(ram_file_line, a_ram(i));
+    end loop;
+    return a_ram;
+  end function;
+
+  -- the packed image is loaded only once, in "top.vhd"
+  -- without image, an empty ram is returned and the files per layer are used
+
+  impure function load_weights_image(
+    constant C_NAME : in string;
+    constant C_SIZE : in integer;
+    constant C_WIDTH : in integer) return t_ram is
+  begin
+
+    if (C_NAME'LENGTH > 0) then
+      return load_content_hex(C_NAME, C_SIZE, C_WIDTH);
+    end if;
+
+    return C_EMPTY_RAM;
+  end function;
+
+  -- use the packed image if available, else the file of the layer
+
+  impure function load_weights(
+    constant C_NAME : in string;
+    constant C_RAM : in t_ram;
+    constant C_OFFSET : in integer;
+    constant C_SIZE : in integer;
+    constant C_KSIZE : in integer;
+    constant C_BITS : in integer) return t_kernel_array is
+  begin
+
+    if (C_RAM'LENGTH > 0) then
+      return ram_to_kernels(C_RAM, C_OFFSET, C_SIZE, C_KSIZE, C_BITS);
+    end if;
+
+    return init_weights(C_NAME, C_SIZE, C_KSIZE, C_BITS);
+  end function;
+
 end array_pkg;